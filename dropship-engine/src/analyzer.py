@@ -7,10 +7,17 @@ import json
 import os
 import re
 
-from anthropic import Anthropic
+from anthropic import Anthropic, APIConnectionError, APIStatusError
 
+from . import usage
+from .llm_cache import ResponseCache, cache_key
+from .llm_calls import TokenTotals, backoff, system_blocks
+from .prompt_encoding import encode, project
 
-NICHE_ANALYSIS_PROMPT = """\
+
+# Static instructions go in the system prompt; NICHE_ANALYSIS_PROMPT holds
+# only the per-batch data.
+NICHE_ANALYSIS_SYSTEM = """\
 You are an expert e-commerce analyst specializing in dropshipping.
 
 Analyze the following scraped product trends and discussions. Extract the most \
@@ -28,12 +35,18 @@ For each niche, provide:
 - confidence: 1-10 rating of how promising this niche is
 - sample_products: 3-5 specific product ideas within this niche
 
-Return valid JSON array of niches. Extract at least 5, up to 15 niches.
+Return valid JSON array of niches. Extract at least 5, up to 15 niches."""
 
-Scraped data:
+NICHE_ANALYSIS_PROMPT = """\
+Scraped data (one row per item, in the order of "columns"):
 {data}"""
 
 
+# Fields of each research result sent for niche analysis, and text clipping
+NICHE_FIELDS = ("title", "source", "text", "score")
+NICHE_TEXT_CHARS = {"text": 200}
+
+
 PRODUCT_EVAL_PROMPT = """\
 You are an expert dropshipping product evaluator.
 
@@ -68,16 +81,52 @@ Return JSON:
 class NicheAnalyzer:
     """Uses Claude to analyze scraped data and identify profitable niches."""
 
-    def __init__(self, api_key: str | None = None):
-        self.client = Anthropic(api_key=api_key or os.environ.get("ANTHROPIC_API_KEY"))
-
-    def _call_llm(self, prompt: str) -> str:
-        response = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4096,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        return response.content[0].text
+    MODEL = "claude-sonnet-4-20250514"
+
+    def __init__(self, api_key: str | None = None, cache: ResponseCache | None = None, max_retries: int = 2):
+        # Retries are handled in _call_llm so the usage ledger records them
+        self.client = Anthropic(api_key=api_key or os.environ.get("ANTHROPIC_API_KEY"), max_retries=0)
+        self.max_retries = max_retries
+        self.cache = cache
+        self.usage = TokenTotals()
+
+    def _call_llm(self, prompt: str, max_tokens: int = 4096, system: str | None = None) -> str:
+        """Send one prompt, retrying on rate limits, overloads and connection errors.
+
+        `system` is sent as a system block, marked for prompt caching only
+        when it is long enough for the API to cache (see system_blocks).
+        """
+        if system:
+            key = cache_key(self.MODEL, prompt, max_tokens, system=system)
+        else:
+            key = cache_key(self.MODEL, prompt, max_tokens)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                usage.record(self.MODEL, cached=True)
+                return cached
+
+        params = {
+            "model": self.MODEL,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if system:
+            params["system"] = system_blocks(self.MODEL, system)
+        with usage.track_call(self.MODEL) as call:
+            for attempt in range(self.max_retries + 1):
+                call.retries = attempt
+                try:
+                    response = self.client.messages.create(**params)
+                    call.usage = getattr(response, "usage", None)
+                    break
+                except (APIStatusError, APIConnectionError) as e:
+                    backoff(e, attempt, self.max_retries)
+        self.usage.add(call.usage)
+        text = response.content[0].text
+        if self.cache and response.stop_reason != "max_tokens":
+            self.cache.put(key, text, model=self.MODEL)
+        return text
 
     def _parse_json(self, text: str) -> list | dict:
         """Extract JSON from LLM response, handling markdown code fences."""
@@ -93,23 +142,21 @@ class NicheAnalyzer:
 
     def analyze_niches(self, research_results: list[dict], batch_size: int = 20) -> list[dict]:
         """Analyze research results and extract promising niches."""
-        condensed = []
-        for r in research_results[:batch_size * 3]:
-            entry = {"title": r.get("title", ""), "source": r.get("source", "")}
-            if r.get("text"):
-                entry["text"] = r["text"][:200]
-            if r.get("score"):
-                entry["score"] = r["score"]
-            condensed.append(entry)
-
-        batches = [condensed[i:i+batch_size] for i in range(0, len(condensed), batch_size)]
+        results = research_results[:batch_size * 3]
+        batches = [results[i:i+batch_size] for i in range(0, len(results), batch_size)]
         all_niches = []
 
         for i, batch in enumerate(batches, 1):
-            print(f"  Analyzing batch {i}/{len(batches)}...")
-            prompt = NICHE_ANALYSIS_PROMPT.format(data=json.dumps(batch, indent=2))
+            # The old prompt sent the same condensed entries, indented
+            condensed = [project(r, NICHE_FIELDS, NICHE_TEXT_CHARS) for r in batch]
+            payload = encode(
+                batch, NICHE_FIELDS, NICHE_TEXT_CHARS, tabular=True, label="niches",
+                baseline=json.dumps(condensed, indent=2),
+            )
+            print(f"  Analyzing batch {i}/{len(batches)} (~{payload.tokens} tokens, {payload.saved} saved)...")
+            prompt = NICHE_ANALYSIS_PROMPT.format(data=payload.text)
             try:
-                result = self._call_llm(prompt)
+                result = self._call_llm(prompt, system=NICHE_ANALYSIS_SYSTEM)
                 niches = self._parse_json(result)
                 if isinstance(niches, list):
                     all_niches.extend(niches)
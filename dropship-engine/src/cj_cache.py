@@ -0,0 +1,177 @@
+"""
+Persistent cache of CJ Dropshipping catalog searches.
+
+Each /product/list search is stored under (query, page, size) as the ordered
+list of product ids it returned. The products themselves are stored once,
+keyed by pid, so a product found by several searches is kept (and refreshed)
+in one place. Entries younger than `ttl` are fresh; entries younger than
+`stale_ttl` are still served, but flagged stale so the caller can refresh
+them in the background (stale-while-revalidate). Everything lives in a
+small SQLite file next to the LLM response cache; crawl-catalog fills it with
+whole categories so sourcing can also run offline (find_products). The CLI
+prunes entries past `stale_ttl` after every sourcing run and crawl.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_STALE_TTL = 7 * 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    query TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    items TEXT NOT NULL,
+    PRIMARY KEY (query, page, size)
+);
+CREATE TABLE IF NOT EXISTS products (
+    pid TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class ProductCache:
+    """SQLite-backed CJ search/product cache with fresh and stale TTLs and hit counters."""
+
+    def __init__(
+        self,
+        path: Path | str,
+        ttl: float = DEFAULT_TTL,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.stale_ttl = max(ttl, stale_ttl)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def get_search(self, query: str, page: int, size: int) -> tuple[list[dict] | None, bool]:
+        """Cached products for a search and whether they are stale.
+
+        Returns (None, False) on a miss: never fetched, older than stale_ttl,
+        or one of its products has gone missing.
+        """
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT fetched_at, items FROM searches WHERE query = ? AND page = ? AND size = ?",
+                (normalize_query(query), page, size),
+            ).fetchone()
+            products = None
+            if row and now - row[0] <= self.stale_ttl:
+                products = self._resolve(json.loads(row[1]))
+            if products is None:
+                self.misses += 1
+                return None, False
+            stale = now - row[0] > self.ttl
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return products, stale
+
+    def _resolve(self, items: list) -> list[dict] | None:
+        pids = [item for item in items if isinstance(item, str)]
+        found = {}
+        for start in range(0, len(pids), 500):
+            chunk = pids[start:start + 500]
+            found.update(self.conn.execute(
+                f"SELECT pid, data FROM products WHERE pid IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        if len(found) < len(set(pids)):
+            return None
+        # Products without a pid can't be shared, so they are stored inline
+        return [json.loads(found[item]) if isinstance(item, str) else item for item in items]
+
+    def put_search(self, query: str, page: int, size: int, products: list[dict]):
+        now = time.time()
+        items = []
+        rows = []
+        for product in products:
+            pid = product.get("pid")
+            if pid:
+                items.append(pid)
+                rows.append((pid, now, json.dumps(product, ensure_ascii=False)))
+            else:
+                items.append(product)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO products (pid, fetched_at, data) VALUES (?, ?, ?)", rows
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO searches (query, page, size, fetched_at, items) VALUES (?, ?, ?, ?, ?)",
+                (normalize_query(query), page, size, now, json.dumps(items, ensure_ascii=False)),
+            )
+
+    def find_products(self, terms: list[str]) -> list[dict]:
+        """Every cached product whose English name contains one of `terms`, by pid.
+
+        Lets sourcing run offline against a catalog mirrored with crawl-catalog.
+        """
+        terms = [term.lower() for term in terms if term]
+        if not terms:
+            return []
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT data FROM products WHERE {' OR '.join('data LIKE ?' for _ in terms)} ORDER BY pid",
+                [f"%{term}%" for term in terms],
+            ).fetchall()
+        products = []
+        for (data,) in rows:
+            product = json.loads(data)
+            name = (product.get("productNameEn") or "").lower()
+            if any(term in name for term in terms):
+                products.append(product)
+        return products
+
+    def prune(self) -> int:
+        """Drop searches past stale_ttl and products no search refers to."""
+        cutoff = time.time() - self.stale_ttl
+        with self._lock, self.conn:
+            removed = self.conn.execute("DELETE FROM searches WHERE fetched_at < ?", (cutoff,)).rowcount
+            referenced = set()
+            for (items,) in self.conn.execute("SELECT items FROM searches"):
+                referenced.update(item for item in json.loads(items) if isinstance(item, str))
+            orphans = [
+                (pid,) for (pid,) in self.conn.execute("SELECT pid FROM products WHERE fetched_at < ?", (cutoff,))
+                if pid not in referenced
+            ]
+            self.conn.executemany("DELETE FROM products WHERE pid = ?", orphans)
+        return removed + len(orphans)
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM searches")
+            self.conn.execute("DELETE FROM products")
+
+    def stats(self) -> dict:
+        with self._lock:
+            searches = self.conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+            products = self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "searches": searches,
+            "products": products,
+        }
@@ -5,10 +5,12 @@ Usage:
   python -m src.cli research                   # Scrape for trending products/niches
   python -m src.cli analyze                    # LLM-analyze research data into niches
   python -m src.cli source                     # Find suppliers + calculate margins
+  python -m src.cli crawl-catalog "Yoga"       # Mirror CJ categories locally (source --offline)
   python -m src.cli build-store                # Generate store via Lovable
   python -m src.cli evaluate "LED desk lamp"   # Quick-evaluate a single product
   python -m src.cli status                     # Show pipeline summary
   python -m src.cli pipeline                   # Full auto: research → analyze → source → build
+  python -m src.cli usage                      # Tokens, cost and latency per run/day/stage
 """
 
 import argparse
@@ -19,9 +21,47 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from . import usage
+from .cli_common import add_usage_parser, cmd_usage, print_cache_stats, print_http_stats, response_cache
+
 load_dotenv(Path(__file__).parent.parent / ".env")
 
 
+def _product_cache(args):
+    """Open the on-disk CJ product cache unless --no-cj-cache was given."""
+    if args.no_cj_cache:
+        return None
+    from .cj_cache import ProductCache
+    return ProductCache(Path("data") / "cj_cache.db", ttl=args.cj_ttl * 3600)
+
+
+def _prune(cache):
+    """Drop CJ cache entries too old to serve, so the cache file stays bounded."""
+    removed = cache.prune()
+    if removed:
+        print(f"Pruned {removed} expired CJ cache entries")
+
+
+def _source(niches: list[dict], args) -> list[dict]:
+    """Source products for the niches, then let stale cache entries finish refreshing."""
+    from .sourcer import ProductSourcer
+
+    if args.offline and args.no_cj_cache:
+        print("Error: --offline sources from the CJ product cache; drop --no-cj-cache")
+        sys.exit(1)
+    cache = _product_cache(args)
+    sourcer = ProductSourcer(cache=cache, offline=args.offline)
+    products = sourcer.source_from_niches(niches, top_n=len(niches))
+    sourcer.cj.wait_for_refreshes()
+    if cache:
+        _prune(cache)
+        stats = cache.stats()
+        print(f"\nCJ cache: {stats['hits']} fresh hits, {stats['stale_hits']} stale (refreshed), "
+              f"{stats['misses']} misses; {stats['products']} products cached")
+    print_http_stats()
+    return products
+
+
 def cmd_research(args):
     from .researcher import ProductResearcher
 
@@ -36,6 +76,7 @@ def cmd_research(args):
     )
     filepath = researcher.save_raw(results, "data")
     print(f"\nDone! {len(results)} results saved to {filepath}")
+    print_http_stats()
     print(f"Next: python -m src.cli analyze --file {filepath}")
 
 
@@ -64,9 +105,11 @@ def cmd_analyze(args):
     results = data.get("results", data) if isinstance(data, dict) else data
 
     print(f"Analyzing {len(results)} results for profitable niches...\n")
-    analyzer = NicheAnalyzer(api_key)
+    cache = response_cache(args)
+    analyzer = NicheAnalyzer(api_key, cache=cache)
     niches = analyzer.analyze_niches(results, batch_size=args.batch or 20)
     ranked = analyzer.rank_niches(niches)
+    print_cache_stats(cache, analyzer)
 
     store = DropshipStore()
     added = store.add_niches(ranked)
@@ -84,7 +127,6 @@ def cmd_analyze(args):
 
 
 def cmd_source(args):
-    from .sourcer import ProductSourcer
     from .storage import DropshipStore
 
     store = DropshipStore()
@@ -95,8 +137,7 @@ def cmd_source(args):
         sys.exit(1)
 
     print(f"Sourcing products for top {len(niches)} niches...\n")
-    sourcer = ProductSourcer()
-    products = sourcer.source_from_niches(niches, top_n=args.top or 3)
+    products = _source(niches, args)
 
     added = store.add_products(products)
     print(f"\nFound {len(products)} products with 30%+ margins, {added} saved")
@@ -111,6 +152,51 @@ def cmd_source(args):
     print("Next: python -m src.cli build-store")
 
 
+def cmd_crawl_catalog(args):
+    from .cj_cache import ProductCache
+    from .sourcer import CJClient
+
+    cache = ProductCache(Path("data") / "cj_cache.db", ttl=args.cj_ttl * 3600)
+    cj = CJClient(cache=cache)
+    categories = cj.get_categories()
+
+    wanted = " ".join(args.category).strip().lower()
+    if args.list or not wanted:
+        for category in categories:
+            if wanted in category["path"].lower():
+                print(f"  {category['id']}  {category['path']}")
+        print(f"\n{len(categories)} CJ categories. Crawl one with: python -m src.cli crawl-catalog <name or id>")
+        return
+
+    matches = [c for c in categories if c["id"].lower() == wanted or wanted in c["path"].lower()]
+    if not matches:
+        print(f"No CJ category matches '{wanted}'. See: python -m src.cli crawl-catalog --list")
+        sys.exit(1)
+
+    print(f"Crawling {len(matches)} CJ categor{'y' if len(matches) == 1 else 'ies'} into data/cj_cache.db "
+          f"({cj.limiter.rate:g} req/s)...\n")
+    total = 0
+    for category in matches:
+        count = 0
+        try:
+            for _ in cj.iter_products(category_id=category["id"], max_pages=args.max_pages,
+                                      concurrency=args.concurrency):
+                count += 1
+        except Exception as e:
+            print(f"  {category['path']}: failed after {count} products: {e}")
+        else:
+            print(f"  {category['path']}: {count} products")
+        total += count
+
+    cj.wait_for_refreshes()
+    _prune(cache)
+    stats = cache.stats()
+    print(f"\nMirrored {total} products; {stats['products']} products cached in total "
+          f"({stats['hits']} pages already fresh, {stats['misses']} fetched)")
+    print_http_stats()
+    print("Next: python -m src.cli source --offline")
+
+
 def cmd_build_store(args):
     from .storage import DropshipStore
     from .store_builder import StoreBuilder
@@ -148,7 +234,7 @@ def cmd_evaluate(args):
     product = " ".join(args.product)
     print(f"Evaluating: {product}\n")
 
-    analyzer = NicheAnalyzer(api_key)
+    analyzer = NicheAnalyzer(api_key, cache=response_cache(args))
     result = analyzer.evaluate_product(product)
     print(json.dumps(result, indent=2))
 
@@ -201,6 +287,7 @@ def cmd_pipeline(args):
         include_google=not args.no_google,
     )
     filepath = researcher.save_raw(results, "data")
+    print_http_stats()
 
     if len(results) < 3:
         print(f"\nOnly found {len(results)} results — not enough data.")
@@ -208,15 +295,18 @@ def cmd_pipeline(args):
 
     # Step 2: Analyze
     print("\n>>> STEP 2/4: Analyzing niches with Claude...\n")
+    usage.set_stage("analyze")
     api_key = os.environ.get("ANTHROPIC_API_KEY")
     if not api_key:
         print("Error: Set ANTHROPIC_API_KEY in .env")
         sys.exit(1)
 
     from .analyzer import NicheAnalyzer
-    analyzer = NicheAnalyzer(api_key)
+    cache = response_cache(args)
+    analyzer = NicheAnalyzer(api_key, cache=cache)
     niches = analyzer.analyze_niches(results, batch_size=20)
     ranked = analyzer.rank_niches(niches)
+    print_cache_stats(cache, analyzer)
 
     from .storage import DropshipStore
     store = DropshipStore()
@@ -233,9 +323,7 @@ def cmd_pipeline(args):
 
     # Step 3: Source
     print("\n>>> STEP 3/4: Sourcing products from suppliers...\n")
-    from .sourcer import ProductSourcer
-    sourcer = ProductSourcer()
-    products = sourcer.source_from_niches(ranked[:3], top_n=3)
+    products = _source(ranked[:3], args)
     store.add_products(products)
     print(f"\nFound {len(products)} profitable products")
 
@@ -283,10 +371,22 @@ def main():
     analyze_p = subparsers.add_parser("analyze", help="LLM-analyze research into niches")
     analyze_p.add_argument("--file", help="Specific research file to analyze")
     analyze_p.add_argument("--batch", type=int, default=20, help="Results per LLM call")
+    analyze_p.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
 
     # source
     source_p = subparsers.add_parser("source", help="Find suppliers and calculate margins")
     source_p.add_argument("--top", type=int, default=3, help="Number of top niches to source")
+    source_p.add_argument("--no-cj-cache", action="store_true", help="Bypass the CJ product cache")
+    source_p.add_argument("--cj-ttl", type=float, default=24, help="Hours before cached CJ searches are refreshed")
+    source_p.add_argument("--offline", action="store_true", help="Source only from the locally mirrored CJ catalog")
+
+    # crawl-catalog
+    crawl_p = subparsers.add_parser("crawl-catalog", help="Mirror CJ categories into the local product cache")
+    crawl_p.add_argument("category", nargs="*", help="Category name (any level, substring match) or id")
+    crawl_p.add_argument("--list", action="store_true", help="List matching CJ categories instead of crawling")
+    crawl_p.add_argument("--max-pages", type=int, help="Stop each category after this many 200-product pages")
+    crawl_p.add_argument("--concurrency", type=int, default=4, help="Pages requested at once")
+    crawl_p.add_argument("--cj-ttl", type=float, default=24, help="Hours before crawled pages are fetched again")
 
     # build-store
     build_p = subparsers.add_parser("build-store", help="Generate store via Lovable")
@@ -295,6 +395,7 @@ def main():
     # evaluate
     eval_p = subparsers.add_parser("evaluate", help="Quick-evaluate a single product idea")
     eval_p.add_argument("product", nargs="+", help="Product description to evaluate")
+    eval_p.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
 
     # status
     subparsers.add_parser("status", help="Show pipeline summary")
@@ -305,6 +406,13 @@ def main():
     pipe_p.add_argument("--no-reddit", action="store_true", help="Skip Reddit")
     pipe_p.add_argument("--no-google", action="store_true", help="Skip Google")
     pipe_p.add_argument("--dry-run", action="store_true", help="Show store prompt without launching")
+    pipe_p.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+    pipe_p.add_argument("--no-cj-cache", action="store_true", help="Bypass the CJ product cache")
+    pipe_p.add_argument("--cj-ttl", type=float, default=24, help="Hours before cached CJ searches are refreshed")
+    pipe_p.add_argument("--offline", action="store_true", help="Source only from the locally mirrored CJ catalog")
+
+    # usage
+    add_usage_parser(subparsers)
 
     args = parser.parse_args()
 
@@ -312,13 +420,17 @@ def main():
         "research": cmd_research,
         "analyze": cmd_analyze,
         "source": cmd_source,
+        "crawl-catalog": cmd_crawl_catalog,
         "build-store": cmd_build_store,
         "evaluate": cmd_evaluate,
         "status": cmd_status,
         "pipeline": cmd_pipeline,
+        "usage": cmd_usage,
     }
 
     if args.command in commands:
+        if args.command != "usage":
+            usage.start_run(args.command)
         commands[args.command](args)
     else:
         parser.print_help()
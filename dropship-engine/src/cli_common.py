@@ -0,0 +1,75 @@
+# Generated from engine-shared/cli_common.py by engine-shared/sync.py. Edit that file, not this copy.
+"""
+CLI helpers shared by the idea and dropship engines: the LLM response cache
+switch, end-of-run cache/HTTP reports, and the `usage` command.
+"""
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from . import usage
+
+
+def response_cache(args):
+    """Open the on-disk LLM response cache unless --no-cache was given."""
+    if args.no_cache:
+        return None
+    from .llm_cache import ResponseCache
+    return ResponseCache(Path("data") / "llm_cache.db")
+
+
+def print_cache_stats(cache, analyzer=None):
+    from .prompt_encoding import format_savings
+
+    if cache:
+        stats = cache.stats()
+        print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses")
+    tokens = analyzer.usage if analyzer else None
+    if tokens and (tokens["cache_read_input_tokens"] or tokens["cache_creation_input_tokens"]):
+        print(f"Prompt cache: {tokens['cache_read_input_tokens']} tokens read, "
+              f"{tokens['cache_creation_input_tokens']} written, {tokens['input_tokens']} uncached input")
+    savings = format_savings()
+    if savings:
+        print(savings)
+
+
+def print_http_stats():
+    from .http_client import default_client
+
+    stats = default_client().format_metrics()
+    if stats:
+        print(f"HTTP connections:\n{stats}")
+
+
+def add_usage_parser(subparsers):
+    usage_p = subparsers.add_parser("usage", help="Token, cost and latency report from data/usage.jsonl")
+    usage_p.add_argument("--days", type=int, help="Only include the last N days")
+    usage_p.add_argument("--run", help="Only include runs whose id starts with this")
+    usage_p.add_argument("--last", type=int, default=10, help="Number of most recent runs to list (0 = all)")
+    return usage_p
+
+
+def cmd_usage(args):
+    entries = usage.load(Path("data") / "usage.jsonl")
+    if args.days:
+        cutoff = (datetime.now(tz=timezone.utc) - timedelta(days=args.days)).isoformat()
+        entries = [e for e in entries if e.get("timestamp", "") >= cutoff]
+    if args.run:
+        entries = [e for e in entries if e.get("run_id", "").startswith(args.run)]
+    if not entries:
+        print("No LLM calls recorded yet.")
+        return
+
+    def table(title, rows):
+        print(f"\n{title}")
+        print(f"  {'':<32} {'calls':>6} {'cached':>6} {'input':>9} {'output':>8} {'cache r/w':>13} {'cost':>8} {'latency':>9}")
+        for row in rows:
+            cache_rw = f"{row['cache_read_input_tokens']}/{row['cache_creation_input_tokens']}"
+            print(f"  {str(row['key'])[:32]:<32} {row['calls']:>6} {row['cached']:>6} {row['input_tokens']:>9} "
+                  f"{row['output_tokens']:>8} {cache_rw:>13} ${row['cost_usd']:>7.3f} {row['latency_s']:>8.1f}s")
+
+    runs = usage.summarize(entries, lambda e: f"{e.get('run_id')} {e.get('command')}")
+    table("Per run:", runs[-args.last:] if args.last else runs)
+    table("Per day:", usage.summarize(entries, lambda e: e.get("timestamp", "")[:10]))
+    stages = usage.summarize(entries, lambda e: f"{e.get('command')}/{e.get('stage')}")
+    table("Per stage (by cost):", sorted(stages, key=lambda r: r["cost_usd"], reverse=True))
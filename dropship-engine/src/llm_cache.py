@@ -0,0 +1,127 @@
+# Generated from engine-shared/llm_cache.py by engine-shared/sync.py. Edit that file, not this copy.
+"""
+Persistent on-disk cache for LLM responses.
+
+Responses are keyed by a SHA-256 of the request (model, prompt, max_tokens
+and any other parameters that change the output) and stored in a small
+SQLite file, with a TTL and a size cap enforced by evicting the
+least-recently-used entries. Re-running a step on the same input costs no
+tokens and no latency.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_TTL = 7 * 86400
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+"""
+
+
+def cache_key(model: str, prompt: str, max_tokens: int, **params) -> str:
+    """Stable hash of everything that determines a response."""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "max_tokens": max_tokens, **params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL, LRU size eviction and hit/miss counters."""
+
+    def __init__(
+        self,
+        path: Path | str,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT text, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl:
+                self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+            if row:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: str, text: str, model: str = ""):
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, created_at, accessed_at, size, text) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, now, now, size, text),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least-recently-used ones until under max_bytes."""
+        cursor = self.conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        self.evictions += cursor.rowcount
+
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
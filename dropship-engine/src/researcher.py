@@ -7,10 +7,11 @@ import json
 import re
 import time
 import urllib.parse
-import urllib.request
 from datetime import datetime, timezone
 from pathlib import Path
 
+from .http_client import HttpClient, default_client
+
 
 GOOGLE_TRENDS_DAILY_URL = "https://trends.google.com/trending/rss?geo=US"
 
@@ -33,18 +34,16 @@ HEADERS = {
 class ProductResearcher:
     """Scrapes multiple sources to find trending products and niches."""
 
-    def __init__(self):
+    def __init__(self, http: HttpClient | None = None):
         self.results = []
+        self.http = http or default_client()
 
     def search_google(self, query: str, num_results: int = 10) -> list[dict]:
         """Search Google for product trends and extract results."""
         encoded = urllib.parse.quote_plus(query)
         url = f"https://www.google.com/search?q={encoded}&num={num_results}"
-        req = urllib.request.Request(url, headers=HEADERS)
-
         try:
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                html = resp.read().decode("utf-8", errors="replace")
+            html = self.http.get(url, headers=HEADERS).text(errors="replace")
 
             results = []
             for match in re.finditer(r'<h3[^>]*>(.*?)</h3>', html, re.DOTALL):
@@ -68,11 +67,8 @@ class ProductResearcher:
         else:
             url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit={limit}"
 
-        req = urllib.request.Request(url, headers={**HEADERS, "Accept": "application/json"})
-
         try:
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
+            data = self.http.get_json(url, headers=HEADERS)
 
             posts = []
             for child in data.get("data", {}).get("children", []):
@@ -94,10 +90,8 @@ class ProductResearcher:
 
     def scrape_trends(self) -> list[dict]:
         """Scrape Google Trends RSS for currently trending topics."""
-        req = urllib.request.Request(GOOGLE_TRENDS_DAILY_URL, headers=HEADERS)
         try:
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                xml = resp.read().decode("utf-8", errors="replace")
+            xml = self.http.get(GOOGLE_TRENDS_DAILY_URL, headers=HEADERS).text(errors="replace")
 
             trends = []
             for match in re.finditer(r'<title>(.*?)</title>', xml):
@@ -1,20 +1,38 @@
 """
 Product sourcing via CJ Dropshipping API.
 Searches for products, retrieves real supplier prices, and calculates margins.
+
+Searches for all niches run concurrently on a thread pool, paced by one
+TokenBucket shared by every CJ request (CJ_QPS, default 1 request/second,
+CJ's limit for standard accounts), so sourcing is bounded by the API quota.
+With a ProductCache, repeated searches are answered locally; stale entries
+are returned immediately and refreshed in the background.
+
+CJClient.iter_products pages through a search, category or the trending
+list 200 products at a time; sourcing stops paging a query as soon as
+enough of its products pass the margin filter.
 """
 
 import json
 import os
+import threading
 import time
 import urllib.parse
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterator
+
+from .cj_cache import ProductCache
+from .http_client import HttpClient, default_client
+from .ratelimit import TokenBucket
 
 
 CJ_API_BASE = "https://developers.cjdropshipping.com/api2.0/v1"
 TOKEN_CACHE = Path(__file__).parent.parent / "data" / ".cj_token.json"
+CJ_DEFAULT_QPS = 1.0
+PAGE_SIZE_MAX = 200
 
 
 @dataclass
@@ -77,9 +95,22 @@ class ProductListing:
 class CJClient:
     """CJ Dropshipping API client with token management."""
 
-    def __init__(self, api_key: str | None = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        requests_per_second: float | None = None,
+        cache: ProductCache | None = None,
+        http: HttpClient | None = None,
+    ):
+        self.http = http or default_client()
         self.api_key = api_key or os.environ.get("CJ_API_KEY", "")
         self._access_token: str | None = None
+        self._token_lock = threading.Lock()
+        rate = requests_per_second or float(os.environ.get("CJ_QPS") or CJ_DEFAULT_QPS)
+        self.limiter = TokenBucket(rate)
+        self.cache = cache
+        self._refreshing: dict[tuple, threading.Thread] = {}
+        self._refresh_lock = threading.Lock()
 
     def _load_cached_token(self) -> str | None:
         if TOKEN_CACHE.exists():
@@ -102,6 +133,11 @@ class CJClient:
 
     def get_access_token(self) -> str:
         """Get a valid access token, using cache or requesting a new one."""
+        # One thread authenticates; the others wait and reuse its token
+        with self._token_lock:
+            return self._get_access_token()
+
+    def _get_access_token(self) -> str:
         if self._access_token:
             return self._access_token
 
@@ -114,16 +150,7 @@ class CJClient:
             raise ValueError("CJ_API_KEY not set. Add it to .env")
 
         url = f"{CJ_API_BASE}/authentication/getAccessToken"
-        payload = json.dumps({"apiKey": self.api_key}).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=payload,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
+        data = self.http.post_json(url, {"apiKey": self.api_key})
 
         if data.get("code") != 200 or not data.get("data"):
             raise ValueError(f"CJ auth failed: {data.get('message', 'Unknown error')}")
@@ -145,44 +172,165 @@ class CJClient:
             query = urllib.parse.urlencode(params)
             url = f"{url}?{query}"
 
-        req = urllib.request.Request(url, headers={"CJ-Access-Token": token})
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            return json.loads(resp.read().decode("utf-8"))
+        self.limiter.acquire()
+        return self.http.get_json(url, headers={"CJ-Access-Token": token})
 
-    def search_products(self, keyword: str, page: int = 1, size: int = 20) -> list[dict]:
-        """Search CJ product catalog."""
-        data = self._api_get("/product/list", {
-            "productNameEn": keyword,
-            "pageNum": page,
-            "pageSize": min(size, 200),
-        })
+    def _fetch_page(self, cache_query: str, params: dict, page: int, size: int) -> list[dict] | None:
+        """One /product/list page; None if CJ returned an error."""
+        data = self._api_get("/product/list", {**params, "pageNum": page, "pageSize": size})
 
         if data.get("code") != 200:
             print(f"    CJ search error: {data.get('message', 'Unknown')}")
-            return []
+            return None
 
         products = data.get("data", {}).get("list", [])
+        if self.cache:
+            self.cache.put_search(cache_query, page, size, products)
         return products
 
+    def _revalidate(self, cache_query: str, params: dict, page: int, size: int):
+        try:
+            self._fetch_page(cache_query, params, page, size)
+        except Exception as e:
+            print(f"    CJ cache refresh failed for '{cache_query}': {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.pop((cache_query, page, size), None)
+
+    def _list_page(self, cache_query: str, params: dict, page: int, size: int) -> list[dict] | None:
+        """A /product/list page, through the product cache when there is one.
+
+        `cache_query` names the listing in the cache: the keyword for
+        searches, "@trending" or "@category:<id>" for the other listings.
+        """
+        size = min(size, PAGE_SIZE_MAX)
+        if self.cache:
+            cached, stale = self.cache.get_search(cache_query, page, size)
+            if cached is not None:
+                if stale:
+                    key = (cache_query, page, size)
+                    with self._refresh_lock:
+                        if key not in self._refreshing:
+                            thread = threading.Thread(
+                                target=self._revalidate, args=(cache_query, params, page, size), daemon=True
+                            )
+                            self._refreshing[key] = thread
+                            thread.start()
+                return cached
+        return self._fetch_page(cache_query, params, page, size)
+
+    def search_products(self, keyword: str, page: int = 1, size: int = 20) -> list[dict]:
+        """Search CJ product catalog, through the product cache when there is one."""
+        return self._list_page(keyword, {"productNameEn": keyword}, page, size) or []
+
+    def wait_for_refreshes(self, timeout: float | None = 60):
+        """Let background cache refreshes finish (call before exiting)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._refresh_lock:
+                threads = list(self._refreshing.values())
+            if not threads:
+                return
+            for thread in threads:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+
     def search_trending(self, page: int = 1, size: int = 20) -> list[dict]:
         """Get trending products from CJ."""
-        data = self._api_get("/product/list", {
-            "searchType": 2,
-            "pageNum": page,
-            "pageSize": min(size, 200),
-        })
+        return self._list_page("@trending", {"searchType": 2}, page, size) or []
+
+    def iter_products(
+        self,
+        keyword: str | None = None,
+        category_id: str | None = None,
+        trending: bool = False,
+        size: int = PAGE_SIZE_MAX,
+        max_pages: int | None = None,
+        concurrency: int = 2,
+    ) -> Iterator[dict]:
+        """Every product of a search, trending list or category, page by page.
+
+        Page 1 is fetched alone, then pages are requested `concurrency` at a
+        time (paced by the rate limiter) and yielded in page order. Iteration ends at the first short
+        page, at `max_pages`, or on a CJ error; stop consuming early and no
+        further pages are requested.
+        """
+        if keyword:
+            cache_query, params = keyword, {"productNameEn": keyword}
+        elif category_id:
+            cache_query, params = f"@category:{category_id}", {"categoryId": category_id}
+        elif trending:
+            cache_query, params = "@trending", {"searchType": 2}
+        else:
+            raise ValueError("iter_products needs a keyword, category_id or trending=True")
+        size = min(size, PAGE_SIZE_MAX)
 
+        pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        try:
+            page = 1
+            while max_pages is None or page <= max_pages:
+                # Page 1 alone first: a caller that stops early often needs no more
+                window = 1 if page == 1 else concurrency
+                last = page + window - 1 if max_pages is None else min(page + window - 1, max_pages)
+                pages = range(page, last + 1)
+                futures = [pool.submit(self._list_page, cache_query, params, n, size) for n in pages]
+                for future in futures:
+                    products = future.result()
+                    if products is None:
+                        return
+                    yield from products
+                    if len(products) < size:
+                        return
+                page = last + 1
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_categories(self) -> list[dict]:
+        """CJ's category tree flattened to its leaves: id, name and full path."""
+        data = self._api_get("/product/getCategory")
         if data.get("code") != 200:
-            return []
-
-        return data.get("data", {}).get("list", [])
+            raise ValueError(f"CJ category list failed: {data.get('message', 'Unknown error')}")
+
+        categories = []
+        for first in data.get("data") or []:
+            for second in first.get("categoryFirstList") or []:
+                for third in second.get("categorySecondList") or []:
+                    categories.append({
+                        "id": third.get("categoryId", ""),
+                        "name": third.get("categoryName", ""),
+                        "path": " > ".join([
+                            first.get("categoryFirstName", ""),
+                            second.get("categorySecondName", ""),
+                            third.get("categoryName", ""),
+                        ]),
+                    })
+        return categories
 
 
 class ProductSourcer:
     """Finds supplier listings via CJ Dropshipping and calculates real margins."""
 
-    def __init__(self, cj_api_key: str | None = None):
-        self.cj = CJClient(api_key=cj_api_key)
+    QUERIES_PER_NICHE = 5
+    # Stop paging a query once this many of its products are relevant and profitable
+    LISTINGS_PER_QUERY = 10
+    MAX_PAGES = 5
+    MIN_MARGIN = 0.30
+
+    def __init__(
+        self,
+        cj_api_key: str | None = None,
+        concurrency: int = 4,
+        cache: ProductCache | None = None,
+        offline: bool = False,
+    ):
+        """With `offline`, queries are answered from the products already in
+        `cache` (e.g. mirrored with crawl-catalog) and CJ is never called."""
+        if offline and cache is None:
+            raise ValueError("Offline sourcing needs a ProductCache")
+        self.cj = CJClient(api_key=cj_api_key, cache=cache)
+        self.concurrency = max(1, concurrency)
+        self.offline = offline
 
     def estimate_sell_price(self, supplier_price: float) -> float:
         """Estimate retail sell price using standard markup rules."""
@@ -221,8 +369,7 @@ class ProductSourcer:
             return False
 
         name_lower = product_name.lower()
-        query_words = [w.lower() for w in query.split()
-                       if len(w) > 2 and w.lower() not in self.NOISE_WORDS]
+        query_words = self._query_words(query)
 
         if not query_words:
             return True
@@ -262,72 +409,155 @@ class ProductSourcer:
             cj_pid=pid,
         )
 
-    def source_niche(self, niche: dict) -> list[dict]:
-        """Given a niche from the analyzer, find sourcing options via CJ."""
-        name = niche.get("name", "")
-        sample_products = niche.get("sample_products", [])
-        category = niche.get("category", "")
-
-        queries = [name]
-        for product in sample_products:
+    def _niche_queries(self, niche: dict) -> list[str]:
+        queries = [niche.get("name", "")]
+        for product in niche.get("sample_products", []):
             if isinstance(product, str):
                 queries.append(product)
             elif isinstance(product, dict):
                 queries.append(product.get("name", str(product)))
+        return queries[:self.QUERIES_PER_NICHE]
+
+    def _query_words(self, query: str) -> list[str]:
+        return [w.lower() for w in query.split() if len(w) > 2 and w.lower() not in self.NOISE_WORDS]
 
+    def _try_listing(self, cj_product: dict, category: str = "") -> ProductListing | None:
+        try:
+            return self.build_product_listing(cj_product, category)
+        except ValueError as e:
+            print(f"    Skipping '{cj_product.get('productNameEn', '')[:40]}': {e}")
+            return None
+
+    def _profitable(self, listing: ProductListing | None, min_margin: float = MIN_MARGIN) -> bool:
+        return listing is not None and listing.net_margin >= min_margin and listing.supplier_price >= 1.0
+
+    def _products(self, query: str) -> Iterator[dict]:
+        if self.offline:
+            yield from self.cj.cache.find_products(self._query_words(query) or [query])
+        else:
+            yield from self.cj.iter_products(keyword=query, max_pages=self.MAX_PAGES, concurrency=2)
+
+    def _search(self, query: str) -> tuple[list[dict], Exception | None]:
+        """Raw CJ products for a query, paging only until LISTINGS_PER_QUERY of
+        them pass the relevance and margin filters."""
+        raw = []
+        passing = 0
+        products = self._products(query)
+        try:
+            for cj_prod in products:
+                raw.append(cj_prod)
+                if (self._is_relevant(cj_prod.get("productNameEn", ""), query)
+                        and self._profitable(self._try_listing(cj_prod))):
+                    passing += 1
+                    if passing >= self.LISTINGS_PER_QUERY:
+                        break
+            return raw, None
+        except Exception as e:
+            return raw, e
+        finally:
+            products.close()
+
+    def _search_all(self, queries: list[str]) -> dict[str, tuple[list[dict], Exception | None]]:
+        """Run each distinct query once, up to `self.concurrency` in flight.
+
+        The CJ client's rate limiter paces the requests across all threads.
+        """
+        unique = list(dict.fromkeys(queries))
+        if self.concurrency == 1 or len(unique) <= 1:
+            return {query: self._search(query) for query in unique}
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(unique))) as pool:
+            return dict(zip(unique, pool.map(self._search, unique)))
+
+    def _niche_listings(self, niche: dict, results: dict, seen_pids: set) -> list[dict]:
+        """Profitable listings for one niche from prefetched search results.
+
+        Queries are processed in order, so which query (and niche) a product
+        shared by several searches ends up under is deterministic. Only
+        products actually listed go into `seen_pids`; one rejected here can
+        still qualify for a later niche.
+        """
+        category = niche.get("category", "")
         all_listings = []
-        seen_pids = set()
+        # Failed the margin check for this niche's category; relevance is per query
+        unprofitable = set()
 
-        for i, query in enumerate(queries[:5]):
-            if i > 0:
-                time.sleep(1.5)
+        for query in self._niche_queries(niche):
             print(f"  Sourcing: '{query}'...")
-            try:
-                raw_products = self.cj.search_products(query, size=10)
-                print(f"    Found {len(raw_products)} products on CJ")
-
-                for cj_prod in raw_products:
-                    pid = cj_prod.get("pid", "")
-                    if pid in seen_pids:
-                        continue
+            raw_products, error = results[query]
+            if error is not None:
+                print(f"    CJ search failed for '{query}': {error}")
+            if not raw_products:
+                continue
+            print(f"    Found {len(raw_products)} products {'in the local catalog' if self.offline else 'on CJ'}")
+
+            for cj_prod in raw_products:
+                pid = cj_prod.get("pid", "")
+                if pid in seen_pids or pid in unprofitable:
+                    continue
+
+                prod_name = cj_prod.get("productNameEn", "")
+                if not self._is_relevant(prod_name, query):
+                    continue
+
+                listing = self._try_listing(cj_prod, category)
+                if self._profitable(listing):
+                    all_listings.append(listing.to_dict())
                     seen_pids.add(pid)
+                else:
+                    unprofitable.add(pid)
 
-                    prod_name = cj_prod.get("productNameEn", "")
-                    if not self._is_relevant(prod_name, query):
-                        continue
-
-                    listing = self.build_product_listing(cj_prod, category)
-                    if listing.net_margin >= 0.30 and listing.supplier_price >= 1.0:
-                        all_listings.append(listing.to_dict())
+        return all_listings
 
-            except Exception as e:
-                print(f"    CJ search failed for '{query}': {e}")
+    def source_niche(self, niche: dict) -> list[dict]:
+        """Given a niche from the analyzer, find sourcing options via CJ."""
+        results = self._search_all(self._niche_queries(niche))
+        return self._niche_listings(niche, results, set())
 
-        return all_listings
+    def get_trending(self, min_margin: float = MIN_MARGIN, limit: int = 50) -> list[dict]:
+        """Get CJ's trending products that meet margin requirements.
 
-    def get_trending(self, min_margin: float = 0.30) -> list[dict]:
-        """Get CJ's trending products that meet margin requirements."""
+        Pages through the trending list until `limit` products qualify.
+        """
         print("  Fetching CJ trending products...")
+        listings = []
+        seen = 0
+        products = self.cj.iter_products(trending=True, max_pages=self.MAX_PAGES)
         try:
-            raw = self.cj.search_trending(size=50)
-            print(f"    Found {len(raw)} trending products")
-
-            listings = []
-            for cj_prod in raw:
-                listing = self.build_product_listing(cj_prod)
-                if listing.net_margin >= min_margin and listing.supplier_price >= 1.0:
+            for cj_prod in products:
+                seen += 1
+                listing = self._try_listing(cj_prod)
+                if self._profitable(listing, min_margin):
                     listings.append(listing.to_dict())
-            return listings
+                    if len(listings) >= limit:
+                        break
         except Exception as e:
             print(f"    CJ trending fetch failed: {e}")
-            return []
+        finally:
+            products.close()
+        print(f"    Checked {seen} trending products, {len(listings)} meet the margin")
+        return listings
 
     def source_from_niches(self, niches: list[dict], top_n: int = 5) -> list[dict]:
-        """Source products for the top N niches via CJ Dropshipping."""
+        """Source products for the top N niches via CJ Dropshipping.
+
+        Every niche's queries are searched concurrently up front. A product
+        (by CJ pid) is listed once, under the first niche that found it, and
+        ties in net profit keep niche/query order, so output is deterministic.
+        """
+        niches = niches[:top_n]
+        queries = [query for niche in niches for query in self._niche_queries(niche)]
+        if self.offline:
+            print(f"Searching the local CJ catalog for {len(set(queries))} queries across {len(niches)} niches...")
+        else:
+            print(f"Searching CJ for {len(set(queries))} queries across {len(niches)} niches "
+                  f"({self.cj.limiter.rate:g} req/s, {self.concurrency} in flight)...")
+        results = self._search_all(queries)
+
         all_products = []
-        for niche in niches[:top_n]:
+        seen_pids = set()
+        for niche in niches:
             print(f"\nSourcing niche: {niche.get('name', 'Unknown')}...")
-            products = self.source_niche(niche)
+            products = self._niche_listings(niche, results, seen_pids)
             for p in products:
                 p["niche"] = niche.get("name", "")
             all_products.extend(products)
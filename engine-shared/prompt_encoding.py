@@ -0,0 +1,135 @@
+"""
+Compact encoding of the records embedded in LLM prompts.
+
+Prompts used to carry json.dumps(records, indent=2) of whole dicts, paying
+for indentation and for fields the model never needs (added_at, status,
+notes, ...). encode() projects each record onto a whitelist of fields, clips
+long text, and serializes without whitespace, or as a column header plus one
+row per record for uniform records. Every call is measured against the
+serialization its prompt used before (the caller's `baseline`) and tallied
+in STATS.
+"""
+
+import json
+import threading
+from typing import NamedTuple
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: ~4 characters per token for English prose and JSON."""
+    return len(text) // 4 + 1
+
+
+def _clip(value, limit: int | None):
+    if limit is None:
+        return value
+    if isinstance(value, str):
+        return value[:limit]
+    if isinstance(value, list):
+        return [str(v)[:limit] if not isinstance(v, (int, float)) else v for v in value[:5]]
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)[:limit]
+    return value
+
+
+def project(
+    record: dict, fields: tuple[str, ...], max_chars: int | dict[str, int] | None = None,
+) -> dict:
+    """Keep only `fields` (in that order), dropping empty values and clipping text.
+
+    `max_chars` is one limit for every field or a per-field mapping.
+    """
+    projected = {}
+    for key in fields:
+        value = record.get(key)
+        if value is None or value == "" or value == []:
+            continue
+        limit = max_chars.get(key) if isinstance(max_chars, dict) else max_chars
+        projected[key] = _clip(value, limit)
+    return projected
+
+
+class EncodedPayload(NamedTuple):
+    text: str
+    tokens: int
+    baseline_tokens: int
+
+    @property
+    def saved(self) -> int:
+        return max(0, self.baseline_tokens - self.tokens)
+
+
+class EncodingStats:
+    """Thread-safe running totals of encoded vs. baseline tokens, per label."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: dict[str, list[int]] = {}
+
+    def record(self, label: str, payload: EncodedPayload):
+        with self._lock:
+            totals = self._totals.setdefault(label, [0, 0, 0])
+            totals[0] += 1
+            totals[1] += payload.tokens
+            totals[2] += payload.baseline_tokens
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                label: {"calls": calls, "tokens": tokens, "baseline_tokens": baseline}
+                for label, (calls, tokens, baseline) in self._totals.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+
+
+STATS = EncodingStats()
+
+
+def encode(
+    records: list[dict],
+    fields: tuple[str, ...] | None = None,
+    max_chars: int | dict[str, int] | None = None,
+    tabular: bool = False,
+    label: str = "prompt",
+    baseline: str | None = None,
+) -> EncodedPayload:
+    """Serialize records for a prompt and record the savings under `label`.
+
+    With `tabular`, the result is {"columns": [...], "rows": [[...], ...]},
+    which drops the repeated keys of uniform records.
+
+    `baseline` is the text the prompt carried before this encoding, built
+    with the same projection or condensing the old prompt applied. It
+    defaults to the records indented, which is only right when they are
+    exactly what the old prompt serialized.
+    """
+    projected = [project(r, fields, max_chars) if fields else r for r in records]
+    if tabular:
+        columns = list(fields) if fields else list(dict.fromkeys(k for r in projected for k in r))
+        columns = [c for c in columns if any(c in r for r in projected)]
+        data = {"columns": columns, "rows": [[r.get(c) for c in columns] for r in projected]}
+    else:
+        data = projected
+    text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    if baseline is None:
+        baseline = json.dumps(records, indent=2, default=str)
+    payload = EncodedPayload(text, estimate_tokens(text), estimate_tokens(baseline))
+    STATS.record(label, payload)
+    return payload
+
+
+def format_savings(stats: EncodingStats | None = None) -> str | None:
+    """One-line report of tokens sent vs. saved, or None if nothing was encoded."""
+    summary = (stats or STATS).summary()
+    if not summary:
+        return None
+    tokens = sum(s["tokens"] for s in summary.values())
+    baseline = sum(s["baseline_tokens"] for s in summary.values())
+    calls = sum(s["calls"] for s in summary.values())
+    saved = max(0, baseline - tokens)
+    pct = 100 * saved / baseline if baseline else 0
+    return f"Prompt encoding: {calls} payloads, ~{tokens} tokens sent, ~{saved} saved ({pct:.0f}%)"
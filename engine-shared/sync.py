@@ -0,0 +1,59 @@
+"""
+Copy the shared engine modules into each engine's src package.
+
+Both engines run as `python -m src.cli` from their own directory, so they
+can't import a sibling package. The modules in engine-shared/ are the
+single source; this script writes them into idea-engine/src and
+dropship-engine/src with a header marking the copy as generated.
+
+Usage:
+  python engine-shared/sync.py           # Update the engine copies
+  python engine-shared/sync.py --check   # Exit 1 if any copy is out of date
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+
+SHARED_DIR = Path(__file__).resolve().parent
+ROOT = SHARED_DIR.parent
+ENGINES = ("idea-engine", "dropship-engine")
+MODULES = (
+    "cli_common.py", "http_client.py", "llm_cache.py", "llm_calls.py", "prompt_encoding.py", "ratelimit.py",
+    "usage.py",
+)
+
+HEADER = "# Generated from engine-shared/{name} by engine-shared/sync.py. Edit that file, not this copy.\n"
+
+
+def rendered(name: str) -> str:
+    return HEADER.format(name=name) + (SHARED_DIR / name).read_text(encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync engine-shared modules into both engines")
+    parser.add_argument("--check", action="store_true", help="Report out-of-date copies instead of writing")
+    args = parser.parse_args()
+
+    stale = []
+    for engine in ENGINES:
+        for name in MODULES:
+            target = ROOT / engine / "src" / name
+            text = rendered(name)
+            current = target.read_text(encoding="utf-8") if target.exists() else None
+            if current == text:
+                continue
+            stale.append(target.relative_to(ROOT))
+            if not args.check:
+                target.write_text(text, encoding="utf-8")
+
+    if args.check:
+        for path in stale:
+            print(f"Out of date: {path}")
+        sys.exit(1 if stale else 0)
+    print(f"Updated {len(stale)} file(s)" if stale else "All copies up to date")
+
+
+if __name__ == "__main__":
+    main()
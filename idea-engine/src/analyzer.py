@@ -8,14 +8,26 @@ Uses Anthropic's Claude API (same key as your OpenClaw setup).
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from dataclasses import dataclass, field, asdict
 
 import anthropic
 
-ANALYSIS_PROMPT = """\
+from . import usage
+from .json_stream import IncrementalJSONParser
+from .llm_cache import ResponseCache, cache_key
+from .llm_calls import TokenTotals, backoff, system_blocks
+from .prompt_encoding import EncodedPayload, encode, estimate_tokens, project
+from .storage import IdeaStore
+
+# Static instructions go in the system prompt (see _request_params); the
+# *_PROMPT templates hold only the per-request data.
+ANALYSIS_SYSTEM = """\
 You are a product researcher analyzing Reddit posts to find viable mobile app ideas.
 
 For each post, extract:
+0. **id**: the post's "id", copied exactly from the input
 1. **problem**: The core pain point or unmet need (1-2 sentences)
 2. **target_audience**: Who has this problem (be specific)
 3. **app_ideas**: 1-3 concrete app ideas that solve this problem. For each idea:
@@ -28,34 +40,84 @@ For each post, extract:
 5. **confidence**: 1-10 rating of how viable this app idea is
 6. **reasoning**: Why you gave that confidence score
 
-Return valid JSON. Be brutally honest about viability — only rate 7+ if there's strong evidence of demand AND the idea is technically feasible as a mobile app.
+Return valid JSON: an array with one object per post, in input order. Be brutally honest
+about viability — only rate 7+ if there's strong evidence of demand AND the idea is
+technically feasible as a mobile app.
+"""
 
+ANALYSIS_PROMPT = """\
 Posts to analyze:
 {posts_json}
 """
 
-BATCH_ANALYSIS_PROMPT = """\
+BATCH_ANALYSIS_SYSTEM = """\
 You are a product strategist reviewing a batch of analyzed app ideas.
 
-Group similar ideas together, identify the strongest opportunities, and rank them.
+Near-duplicate ideas have already been merged (alternate names are listed under "aliases").
+Identify the strongest opportunities and rank them.
 
 For the top ideas, also suggest:
 - **validation_steps**: How to quickly validate demand (specific subreddits to post in, questions to ask)
 - **mvp_scope**: What the minimum viable product looks like
 - **differentiator**: What would make this better than existing solutions
 
-Input ideas:
-{ideas_json}
-
 Return a JSON object with:
-- "top_ideas": ranked list of the best opportunities (max 10)
+- "top_ideas": ranked list of the best opportunities (max 10). Each entry has the
+  idea's "ref" plus your validation_steps, mvp_scope and differentiator; don't
+  repeat the idea's other fields
 - "themes": common problem themes you noticed
 - "rejected": ideas you'd skip and why (brief)
 """
 
+BATCH_ANALYSIS_PROMPT = """\
+Input ideas:
+{ideas_json}
+"""
+
+SHARD_RANK_SYSTEM = """\
+You are a product strategist shortlisting app ideas. Each idea has a numeric "ref".
+
+Pick the strongest opportunities: clear demand, feasible as a mobile app, and
+a realistic path to revenue.
+
+Return a JSON object: {"top": [refs of the chosen ideas, best first]}
+"""
+
+SHARD_RANK_PROMPT = """\
+Pick the {keep} strongest of these ideas:
+{ideas_json}
+"""
+
 
 import re
 
+# Output budget for one analysis request, and a rough per-post output estimate
+# (1-3 ideas with features, signals and reasoning), used to size batches
+ANALYSIS_MAX_TOKENS = 8192
+OUTPUT_TOKENS_PER_POST = 900
+
+
+# Fields of each post sent for analysis
+POST_FIELDS = ("id", "source", "title", "body", "score", "num_comments")
+
+# Ranking: fields sent per idea, the cap on each text field, ideas per shard,
+# and how many of each shard's best are carried into the next round
+RANK_FIELDS = (
+    "ref", "name", "aliases", "problem", "description", "target_audience",
+    "monetization", "complexity", "confidence", "market_signals",
+)
+RANK_TEXT_CHARS = 280
+RANK_SHARD_SIZE = 40
+RANK_CARRY = 8
+
+
+class TruncatedResponseError(Exception):
+    """The model hit max_tokens before finishing; `text` holds the partial output."""
+
+    def __init__(self, text: str):
+        super().__init__("response truncated at max_tokens")
+        self.text = text
+
 
 def _extract_json(text: str):
     """Extract JSON from LLM response, handling code fences and quirks."""
@@ -80,6 +142,21 @@ def _extract_json(text: str):
     raise json.JSONDecodeError("No valid JSON found", text, 0)
 
 
+def _dedupe_parts(parts: list[tuple[list[dict], list[dict]]]) -> list[tuple[list[dict], list[dict]]]:
+    """Keep each post, and the ideas drawn from it, in the first part that has it."""
+    seen_posts = set()
+    seen_sources = set()
+    out = []
+    for posts, ideas in parts:
+        posts = [p for p in posts if str(p["id"]) not in seen_posts]
+        ideas = [i for i in ideas if not i.get("source_post_id") or str(i["source_post_id"]) not in seen_sources]
+        seen_posts.update(str(p["id"]) for p in posts)
+        seen_sources.update(str(i["source_post_id"]) for i in ideas if i.get("source_post_id"))
+        if posts or ideas:
+            out.append((posts, ideas))
+    return out
+
+
 def _normalize_ideas(parsed, source_posts: list[dict]) -> list[dict]:
     """Normalize LLM output into a flat list of ideas with names."""
     ideas = []
@@ -127,6 +204,17 @@ def _normalize_ideas(parsed, source_posts: list[dict]) -> list[dict]:
     return ideas
 
 
+def _compact_json(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _confidence_value(idea: dict) -> float:
+    try:
+        return float(idea.get("confidence") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
 @dataclass
 class AppIdea:
     name: str
@@ -144,73 +232,461 @@ class AppIdea:
     validation_steps: list[str] = field(default_factory=list)
 
 
-class IdeaAnalyzer:
-    def __init__(self, api_key: str, model: str = "claude-sonnet-4-20250514"):
-        self.client = anthropic.Anthropic(api_key=api_key)
-        self.model = model
+class BatchPacker:
+    """Incremental form of IdeaAnalyzer.pack_batches for posts that arrive over time."""
 
-    def analyze_posts(self, posts: list[dict], batch_size: int = 5) -> list[dict]:
-        """Analyze a batch of Reddit posts and extract app ideas."""
-        all_analyses = []
+    def __init__(self, analyzer: "IdeaAnalyzer", max_posts: int | None = None):
+        self.analyzer = analyzer
+        self.cap = ANALYSIS_MAX_TOKENS // OUTPUT_TOKENS_PER_POST
+        if max_posts:
+            self.cap = min(self.cap, max_posts)
+        self.overhead = estimate_tokens(ANALYSIS_SYSTEM + ANALYSIS_PROMPT)
+        self.current: list[dict] = []
+        self.used = self.overhead
 
-        for i in range(0, len(posts), batch_size):
-            batch = posts[i : i + batch_size]
-            print(f"Analyzing posts {i+1}-{min(i+batch_size, len(posts))} of {len(posts)}...")
+    def add(self, post: dict) -> list[dict] | None:
+        """Add a post; returns the previous batch if this post didn't fit in it."""
+        cost = estimate_tokens(_compact_json(project(self.analyzer._simplify(post), POST_FIELDS)))
+        closed = None
+        if self.current and (self.used + cost > self.analyzer.token_budget or len(self.current) >= self.cap):
+            closed = self.flush()
+        self.current.append(post)
+        self.used += cost
+        return closed
 
-            simplified = [
-                {
-                    "id": p["id"],
-                    "source": p.get("source", p.get("subreddit", "unknown")),
-                    "title": p["title"],
-                    "body": p.get("body", "")[:500],
-                    "score": p.get("score", 0),
-                    "num_comments": p.get("num_comments", 0),
-                }
-                for p in batch
-            ]
+    def flush(self) -> list[dict] | None:
+        """Close and return the batch being filled, if any."""
+        batch, self.current, self.used = self.current, [], self.overhead
+        return batch or None
 
-            prompt = ANALYSIS_PROMPT.format(posts_json=json.dumps(simplified, indent=2))
 
-            try:
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=4096,
-                    messages=[{"role": "user", "content": prompt}],
-                )
-
-                text = response.content[0].text
-                parsed = _extract_json(text)
-                ideas = _normalize_ideas(parsed, batch)
-                all_analyses.extend(ideas)
-
-            except json.JSONDecodeError as e:
-                print(f"  Warning: failed to parse LLM response: {e}")
-                print(f"  Raw response: {text[:200]}...")
-            except Exception as e:
-                print(f"  Error analyzing batch: {e}")
+class IdeaAnalyzer:
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-sonnet-4-20250514",
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        cache: ResponseCache | None = None,
+        client: anthropic.Anthropic | None = None,
+        token_budget: int = 12000,
+        max_body_chars: int = 1500,
+    ):
+        # Retries are handled in _call_llm so backoff is shared across workers
+        self.client = client or anthropic.Anthropic(api_key=api_key, max_retries=0)
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.cache = cache
+        self.token_budget = token_budget
+        self.max_body_chars = max_body_chars
+        self.usage = TokenTotals()
+
+    def _request_params(self, prompt: str, max_tokens: int, system: str | None = None) -> dict:
+        """messages.create arguments; `system` goes in a system block.
+
+        system_blocks only marks it for prompt caching once it is long enough
+        for the API to cache; the current instructions are below that minimum.
+        """
+        params = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if system:
+            params["system"] = system_blocks(self.model, system)
+        return params
+
+    def _request_key(self, prompt: str, max_tokens: int, system: str | None = None) -> str:
+        if system:
+            return cache_key(self.model, prompt, max_tokens, system=system)
+        return cache_key(self.model, prompt, max_tokens)
+
+    def _call_llm(
+        self, prompt: str, max_tokens: int = 4096, strict: bool = False, system: str | None = None,
+    ) -> str:
+        """Send one prompt, retrying on rate limits, overloads and connection errors.
+
+        Served from self.cache when the same request has been answered before.
+        With `strict`, a response cut off at max_tokens raises
+        TruncatedResponseError instead of being returned.
+        """
+        key = self._request_key(prompt, max_tokens, system)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                usage.record(self.model, cached=True)
+                return cached
+
+        with usage.track_call(self.model) as call:
+            for attempt in range(self.max_retries + 1):
+                call.retries = attempt
+                try:
+                    response = self.client.messages.create(**self._request_params(prompt, max_tokens, system))
+                    call.usage = getattr(response, "usage", None)
+                    self.usage.add(call.usage)
+                    text = response.content[0].text
+                    break
+                except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                    backoff(e, attempt, self.max_retries)
+
+        # Truncated output would poison later runs, so don't keep it
+        if response.stop_reason == "max_tokens":
+            if strict:
+                raise TruncatedResponseError(text)
+        elif self.cache:
+            self.cache.put(key, text, model=self.model)
+        return text
+
+    def _stream_llm(self, prompt: str, max_tokens: int, on_text, system: str | None = None) -> str:
+        """Stream one prompt, passing text chunks to `on_text` as they arrive.
+
+        Returns the stop reason. Requests are retried like _call_llm, but only
+        until the first chunk has been delivered; after that an error
+        propagates and the caller keeps whatever it already parsed.
+        """
+        key = self._request_key(prompt, max_tokens, system)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                usage.record(self.model, cached=True)
+                on_text(cached)
+                return "end_turn"
+
+        chunks = []
+        with usage.track_call(self.model) as call:
+            for attempt in range(self.max_retries + 1):
+                call.retries = attempt
+                try:
+                    with self.client.messages.stream(**self._request_params(prompt, max_tokens, system)) as stream:
+                        for chunk in stream.text_stream:
+                            chunks.append(chunk)
+                            on_text(chunk)
+                        final = stream.get_final_message()
+                        call.usage = getattr(final, "usage", None)
+                        self.usage.add(call.usage)
+                        stop_reason = final.stop_reason
+                    break
+                except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                    if chunks:
+                        raise
+                    backoff(e, attempt, self.max_retries)
+
+        if stop_reason != "max_tokens" and self.cache:
+            self.cache.put(key, "".join(chunks), model=self.model)
+        return stop_reason
+
+    def _stream_batch(
+        self, batch: list[dict], start: int, total: int, memo: IdeaStore | None = None,
+    ) -> list[tuple[list[dict], list[dict]]]:
+        """Streaming variant of _analyze_batch.
+
+        Each post analysis is normalized (and added to `memo`, if given) as soon
+        as its closing brace arrives. If the stream is truncated or dies, the
+        posts whose analyses completed are kept and the rest are retried.
+        """
+        payload = self._encode_batch(batch)
+        print(f"Streaming analysis of posts {start+1}-{start+len(batch)}{f' of {total}' if total else ''} "
+              f"(~{payload.tokens} tokens, {payload.saved} saved)...")
+        parser = IncrementalJSONParser()
+        ideas = []
+        covered = set()
+        ids = [str(p["id"]) for p in batch]
+
+        def handle(obj):
+            # Map each analysis to its post by echoed id, else by position
+            post_id = str(obj.get("id", "")) if isinstance(obj, dict) else ""
+            if post_id not in ids:
+                position = len(covered)
+                post_id = ids[position] if position < len(ids) else ""
+            found = _normalize_ideas([obj], batch)
+            for idea in found:
+                if not idea.get("source_post_id"):
+                    idea["source_post_id"] = post_id
+            if memo is not None:
+                memo.add_ideas(found)
+            ideas.extend(found)
+            if post_id:
+                covered.add(post_id)
+
+        def on_text(chunk: str):
+            for obj in parser.feed(chunk):
+                handle(obj)
+
+        try:
+            prompt = ANALYSIS_PROMPT.format(posts_json=payload.text)
+            stop_reason = self._stream_llm(prompt, ANALYSIS_MAX_TOKENS, on_text, system=ANALYSIS_SYSTEM)
+        except Exception as e:
+            print(f"  Stream failed after {len(ideas)} ideas: {e}")
+            stop_reason = "error"
+
+        if stop_reason not in ("max_tokens", "error"):
+            if not parser.emitted:
+                # Not an array/object of analyses; fall back to whole-text parsing
+                try:
+                    found = _normalize_ideas(_extract_json(parser.text), batch)
+                except json.JSONDecodeError as e:
+                    print(f"  Warning: failed to parse LLM response: {e}")
+                    return []
+                if memo is not None:
+                    memo.add_ideas(found)
+                ideas.extend(found)
+            return [(batch, ideas)]
+
+        done = [p for p in batch if str(p["id"]) in covered]
+        remaining = [p for p in batch if str(p["id"]) not in covered]
+        parts = [(done, ideas)] if ideas else []
+        if stop_reason == "error" or not remaining:
+            return parts
+        if done:
+            print(f"  Kept {len(ideas)} ideas from the cut-off stream, retrying {len(remaining)} posts")
+            # Analyses arrive in input order, so the remainder is normally the batch's tail
+            offset = start + batch.index(remaining[0])
+            return _dedupe_parts(parts + self._stream_batch(remaining, offset, total, memo))
+        if len(batch) == 1:
+            print(f"  Warning: response for post {batch[0].get('id')} truncated even on its own, skipping")
+            return parts
+        mid = len(batch) // 2
+        print(f"  Response truncated, splitting {len(batch)} posts and retrying")
+        return _dedupe_parts(parts + self._stream_batch(batch[:mid], start, total, memo)
+                             + self._stream_batch(batch[mid:], start + mid, total, memo))
+
+    def _analyze_batch(self, batch: list[dict], start: int, total: int) -> list[tuple[list[dict], list[dict]]]:
+        """Analyze one batch; returns (posts, ideas) for every part that succeeded.
+
+        If the response is truncated at max_tokens the batch is split in half
+        and each half retried, so one long answer doesn't lose the whole batch.
+        """
+        payload = self._encode_batch(batch)
+        print(f"Analyzing posts {start+1}-{start+len(batch)}{f' of {total}' if total else ''} "
+              f"(~{payload.tokens} tokens, {payload.saved} saved)...")
+
+        text = ""
+        try:
+            prompt = ANALYSIS_PROMPT.format(posts_json=payload.text)
+            text = self._call_llm(prompt, max_tokens=ANALYSIS_MAX_TOKENS, strict=True, system=ANALYSIS_SYSTEM)
+            parsed = _extract_json(text)
+            return [(batch, _normalize_ideas(parsed, batch))]
+
+        except TruncatedResponseError:
+            if len(batch) == 1:
+                print(f"  Warning: response for post {batch[0].get('id')} truncated even on its own, skipping")
+                return []
+            mid = len(batch) // 2
+            print(f"  Response truncated, splitting {len(batch)} posts and retrying")
+            return (self._analyze_batch(batch[:mid], start, total)
+                    + self._analyze_batch(batch[mid:], start + mid, total))
+        except json.JSONDecodeError as e:
+            print(f"  Warning: failed to parse LLM response: {e}")
+            print(f"  Raw response: {text[:200]}...")
+        except Exception as e:
+            print(f"  Error analyzing batch: {e}")
+        return []
+
+    def _simplify(self, post: dict) -> dict:
+        return {
+            "id": post["id"],
+            "source": post.get("source", post.get("subreddit", "unknown")),
+            "title": post["title"],
+            "body": post.get("body", "")[:self.max_body_chars],
+            "score": post.get("score", 0),
+            "num_comments": post.get("num_comments", 0),
+        }
+
+    def _encode_batch(self, batch: list[dict]) -> EncodedPayload:
+        simplified = [self._simplify(p) for p in batch]
+        # The old prompt sent the simplified posts indented
+        return encode(simplified, POST_FIELDS, label="analysis", baseline=json.dumps(simplified, indent=2))
+
+    def _batch_prompt(self, batch: list[dict]) -> str:
+        return ANALYSIS_PROMPT.format(posts_json=self._encode_batch(batch).text)
+
+    def pack_batches(self, posts: list[dict], max_posts: int | None = None) -> list[list[dict]]:
+        """Greedily fill each request up to self.token_budget input tokens.
+
+        A batch is also closed once its estimated output would exceed
+        ANALYSIS_MAX_TOKENS, or when it reaches `max_posts`. Order is kept.
+        """
+        packer = BatchPacker(self, max_posts)
+        batches = [batch for batch in map(packer.add, posts) if batch]
+        last = packer.flush()
+        if last:
+            batches.append(last)
+        return batches
+
+    def analyze_posts(
+        self,
+        posts: list[dict],
+        batch_size: int | None = None,
+        concurrency: int | None = None,
+        memo: IdeaStore | None = None,
+        stream: bool = False,
+    ) -> list[dict]:
+        """Analyze a batch of Reddit posts and extract app ideas.
+
+        Posts are packed into requests by pack_batches (at most `batch_size`
+        each, if given). Batches run on up to `concurrency` worker threads
+        (default self.max_concurrency); ideas are returned in input order.
+
+        With a `memo` store, posts it has already analyzed (same source, id
+        and content) are skipped, and each successful batch's ideas are saved
+        together with its posts' memo entries as soon as the batch finishes.
+
+        With `stream`, responses are streamed and each idea is stored as soon
+        as it is complete instead of when its batch finishes.
+        """
+        if memo is not None:
+            pending = memo.pending_posts(posts)
+            if len(pending) < len(posts):
+                print(f"Skipping {len(posts) - len(pending)} already-analyzed posts")
+            posts = pending
+
+        batches = self.pack_batches(posts, max_posts=batch_size)
+        starts = [sum(len(b) for b in batches[:n]) for n in range(len(batches))]
+        workers = min(concurrency or self.max_concurrency, len(batches)) or 1
+        if batches:
+            print(f"Packed {len(posts)} posts into {len(batches)} requests")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            if stream:
+                futures = [
+                    pool.submit(self._stream_batch, batch, start, len(posts), memo)
+                    for start, batch in zip(starts, batches)
+                ]
+            else:
+                futures = [
+                    pool.submit(self._analyze_batch, batch, start, len(posts))
+                    for start, batch in zip(starts, batches)
+                ]
+            all_analyses = []
+            for future in futures:
+                for part, ideas in future.result():
+                    if memo is not None:
+                        memo.record_analysis(part, ideas)
+                    all_analyses.extend(ideas)
 
         return all_analyses
 
+    @staticmethod
+    def _rank_record(analyses: list[dict], ref: int) -> dict:
+        return {**analyses[ref], "ref": ref}
+
+    def _rank_shards(self, analyses: list[dict], refs: list[int]) -> list[list[int]]:
+        """Split ideas into shards that fit one request (by count and self.token_budget)."""
+        overhead = estimate_tokens(SHARD_RANK_SYSTEM + SHARD_RANK_PROMPT)
+        shards, current, used = [], [], overhead
+        for ref in refs:
+            compact = project(self._rank_record(analyses, ref), RANK_FIELDS, RANK_TEXT_CHARS)
+            cost = estimate_tokens(_compact_json(compact))
+            if current and (used + cost > self.token_budget or len(current) >= RANK_SHARD_SIZE):
+                shards.append(current)
+                current, used = [], overhead
+            current.append(ref)
+            used += cost
+        if current:
+            shards.append(current)
+        return shards
+
+    def _encode_ideas(self, analyses: list[dict], refs: list[int]) -> EncodedPayload:
+        records = [self._rank_record(analyses, ref) for ref in refs]
+        # Ranking already sent clipped, whitespace-free projections before encode()
+        compact = [project(record, RANK_FIELDS, RANK_TEXT_CHARS) for record in records]
+        baseline = json.dumps(compact, ensure_ascii=False, separators=(",", ":"))
+        return encode(records, RANK_FIELDS, RANK_TEXT_CHARS, label="ranking", baseline=baseline)
+
+    def _shortlist(self, analyses: list[dict], shard: list[int], keep: int) -> list[int]:
+        """Ask for a shard's best `keep` ideas; falls back to local confidence on failure."""
+        payload = self._encode_ideas(analyses, shard)
+        prompt = SHARD_RANK_PROMPT.format(keep=keep, ideas_json=payload.text)
+        try:
+            parsed = _extract_json(self._call_llm(prompt, max_tokens=1024, system=SHARD_RANK_SYSTEM))
+            refs = parsed.get("top", []) if isinstance(parsed, dict) else parsed
+            chosen = []
+            for ref in refs:
+                try:
+                    ref = int(ref)
+                except (TypeError, ValueError):
+                    continue
+                if ref in shard and ref not in chosen:
+                    chosen.append(ref)
+            if chosen:
+                return chosen[:keep]
+        except Exception as e:
+            print(f"  Error shortlisting shard: {e}")
+        return sorted(shard, key=lambda ref: _confidence_value(analyses[ref]), reverse=True)[:keep]
+
+    @staticmethod
+    def _full_top_ideas(analyses: list[dict], candidates: list[int], top: list) -> list[dict]:
+        """Rebuild the final ranking from the full analyses the refs point at.
+
+        The model only saw compact, truncated projections, so each entry keeps
+        just its commentary (validation steps, MVP scope, ...) on top of the
+        original idea. Entries without a usable ref are kept as returned.
+        """
+        ideas, seen = [], set()
+        for entry in top:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                ref = int(entry.get("ref"))
+            except (TypeError, ValueError):
+                ref = None
+            if ref not in candidates:
+                ideas.append(entry)
+                continue
+            if ref in seen:
+                continue
+            seen.add(ref)
+            commentary = {k: v for k, v in entry.items() if k not in RANK_FIELDS}
+            ideas.append({**analyses[ref], **commentary})
+        return ideas
+
     def rank_ideas(self, analyses: list[dict]) -> dict:
-        """Take all analyzed ideas and rank/consolidate them."""
+        """Rank analyzed ideas. Merge near-duplicates first with IdeaStore.consolidate().
+
+        Ideas are reduced to compact fields. While they don't fit a single
+        request, they are split into shards that are shortlisted in parallel
+        and the best of each shard go on to the next round, so cost grows
+        roughly linearly with the number of ideas and no request overflows
+        the context window. The final round produces the full ranking, whose
+        top ideas are rebuilt from the full analyses by ref.
+        """
         if not analyses:
             return {"top_ideas": [], "themes": [], "rejected": []}
 
-        prompt = BATCH_ANALYSIS_PROMPT.format(ideas_json=json.dumps(analyses, indent=2))
+        candidates = list(range(len(analyses)))
+        round_no = 0
+        while True:
+            shards = self._rank_shards(analyses, candidates)
+            if len(shards) == 1:
+                break
+            round_no += 1
+            keep = [min(RANK_CARRY, max(1, len(shard) // 2)) for shard in shards]
+            print(f"  Ranking round {round_no}: {len(candidates)} ideas in {len(shards)} shards")
+            workers = min(self.max_concurrency, len(shards))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                shortlists = list(pool.map(partial(self._shortlist, analyses), shards, keep))
+            candidates = [ref for shortlist in shortlists for ref in shortlist]
+
+        payload = self._encode_ideas(analyses, candidates)
+        prompt = BATCH_ANALYSIS_PROMPT.format(ideas_json=payload.text)
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                messages=[{"role": "user", "content": prompt}],
-            )
-
-            text = response.content[0].text
-            return _extract_json(text)
+            text = self._call_llm(prompt, max_tokens=ANALYSIS_MAX_TOKENS, system=BATCH_ANALYSIS_SYSTEM)
+            ranked = _extract_json(text)
+            if isinstance(ranked, dict):
+                ranked["top_ideas"] = self._full_top_ideas(analyses, candidates, ranked.get("top_ideas") or [])
+            return ranked
 
         except Exception as e:
             print(f"Error ranking ideas: {e}")
-            return {"top_ideas": analyses[:10], "themes": [], "rejected": [], "error": str(e)}
+            finalists = sorted(candidates, key=lambda ref: _confidence_value(analyses[ref]), reverse=True)[:10]
+            return {
+                "top_ideas": [analyses[ref] for ref in finalists],
+                "themes": [],
+                "rejected": [],
+                "error": str(e),
+            }
 
     def quick_evaluate(self, idea_description: str) -> dict:
         """Quick evaluation of a single app idea."""
@@ -224,13 +700,7 @@ Evaluate this app idea. Return JSON with:
 
 Idea: {idea_description}"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2048,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        text = response.content[0].text
+        text = self._call_llm(prompt, max_tokens=2048)
         json_start = text.find("{")
         json_end = text.rfind("}") + 1
         return json.loads(text[json_start:json_end])
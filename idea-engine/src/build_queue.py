@@ -0,0 +1,265 @@
+"""
+Durable queue of OpenClaw build jobs.
+
+Jobs live in data/build_queue.db (stdlib sqlite3) and move through
+queued -> running -> succeeded, or -> retrying -> ... -> failed once their
+attempts run out. Each job has an idempotency key derived from the idea's
+normalized name and the agent, so enqueueing an idea that was already
+built, or is already waiting, is a no-op: repeated runs never pay for a
+duplicate multi-minute build, and a crashed run leaves a record of what was
+sent.
+
+BuildWorker drains the queue through a BuildScheduler (`build --worker`).
+Claims use BEGIN IMMEDIATE, so several worker processes can share a queue.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .builder import BuildScheduler
+from .similarity import normalize_name
+
+
+STATES = ("queued", "running", "succeeded", "failed", "retrying")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS build_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    idea_name TEXT NOT NULL,
+    idea TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    worker TEXT,
+    started_at REAL,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_build_jobs_state ON build_jobs(state, next_attempt_at);
+"""
+
+
+def idempotency_key(idea: dict, agent: str = "dev") -> str:
+    """Same idea (by normalized name) for the same agent -> same key."""
+    return hashlib.sha256(f"{agent}:{normalize_name(idea.get('name', ''))}".encode("utf-8")).hexdigest()
+
+
+def _now_iso() -> str:
+    return datetime.now(tz=timezone.utc).isoformat()
+
+
+class BuildQueue:
+    def __init__(
+        self,
+        path: Path | str = Path("data") / "build_queue.db",
+        max_attempts: int = 2,
+        retry_delay: float = 300,
+        agent: str = "dev",
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.agent = agent
+
+        self._lock = threading.Lock()
+        # Autocommit; multi-statement changes use explicit BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def _row(self, row) -> dict | None:
+        if row is None:
+            return None
+        columns = ("id", "idempotency_key", "idea_name", "idea", "state", "attempts", "max_attempts",
+                   "next_attempt_at", "worker", "started_at", "result", "error", "created_at", "updated_at")
+        job = dict(zip(columns, row))
+        job["idea"] = json.loads(job["idea"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, ideas: list[dict], retry_failed: bool = False) -> list[tuple[dict, bool]]:
+        """Queue a build per idea; returns (job, newly_queued) in input order.
+
+        Ideas whose key already has a job keep that job, whatever its state.
+        With `retry_failed`, failed jobs (and ones waiting out a retry delay) are
+        queued again right away with a fresh attempt budget.
+        """
+        out = []
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for idea in ideas:
+                    key = idempotency_key(idea, self.agent)
+                    now = _now_iso()
+                    existing = self.conn.execute(
+                        "SELECT state FROM build_jobs WHERE idempotency_key = ?", (key,)
+                    ).fetchone()
+                    created = existing is None
+                    if created:
+                        self.conn.execute(
+                            "INSERT INTO build_jobs "
+                            "(idempotency_key, idea_name, idea, state, max_attempts, created_at, updated_at) "
+                            "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                            (key, idea.get("name", "Unnamed"), json.dumps(idea, ensure_ascii=False),
+                             self.max_attempts, now, now),
+                        )
+                    elif retry_failed:
+                        cursor = self.conn.execute(
+                            "UPDATE build_jobs SET state = 'queued', attempts = 0, next_attempt_at = 0, "
+                            "idea = ?, error = NULL, updated_at = ? "
+                            "WHERE idempotency_key = ? AND state IN ('failed', 'retrying')",
+                            (json.dumps(idea, ensure_ascii=False), now, key),
+                        )
+                        created = cursor.rowcount == 1
+                    job = self.conn.execute(
+                        "SELECT * FROM build_jobs WHERE idempotency_key = ?", (key,)
+                    ).fetchone()
+                    out.append((self._row(job), created))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return out
+
+    def claim(self, worker: str) -> dict | None:
+        """Atomically take the oldest runnable job and mark it running."""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT * FROM build_jobs WHERE state IN ('queued', 'retrying') AND next_attempt_at <= ? "
+                    "ORDER BY next_attempt_at, id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                self.conn.execute(
+                    "UPDATE build_jobs SET state = 'running', attempts = attempts + 1, worker = ?, "
+                    "started_at = ?, updated_at = ? WHERE id = ?",
+                    (worker, now, _now_iso(), row[0]),
+                )
+                job = self.conn.execute("SELECT * FROM build_jobs WHERE id = ?", (row[0],)).fetchone()
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return self._row(job)
+
+    def complete(self, job: dict, result: dict) -> str:
+        """Record a finished attempt; returns the job's new state."""
+        if result.get("success"):
+            state, next_at, error = "succeeded", 0, None
+        else:
+            error = result.get("error") or (
+                "timed out" if result.get("timed_out") else f"exit {result.get('returncode')}"
+            )
+            if job["attempts"] < job["max_attempts"]:
+                state = "retrying"
+                next_at = time.time() + self.retry_delay * 2 ** (job["attempts"] - 1)
+            else:
+                state, next_at = "failed", 0
+        with self._lock:
+            self.conn.execute(
+                "UPDATE build_jobs SET state = ?, next_attempt_at = ?, result = ?, error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (state, next_at, json.dumps(result, ensure_ascii=False), error, _now_iso(), job["id"]),
+            )
+        return state
+
+    def recover_stale(self, max_runtime: float) -> int:
+        """Put jobs left running by a crashed worker back in line (counts as an attempt)."""
+        cutoff = time.time() - max_runtime
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE build_jobs SET state = CASE WHEN attempts < max_attempts THEN 'retrying' ELSE 'failed' END, "
+                "error = 'worker died while running', next_attempt_at = 0, updated_at = ? "
+                "WHERE state = 'running' AND started_at < ?",
+                (_now_iso(), cutoff),
+            )
+        return cursor.rowcount
+
+    def get(self, job_id: int) -> dict | None:
+        with self._lock:
+            return self._row(self.conn.execute("SELECT * FROM build_jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def jobs(self, state: str | None = None) -> list[dict]:
+        with self._lock:
+            if state:
+                rows = self.conn.execute("SELECT * FROM build_jobs WHERE state = ? ORDER BY id", (state,))
+            else:
+                rows = self.conn.execute("SELECT * FROM build_jobs ORDER BY id")
+            return [self._row(row) for row in rows.fetchall()]
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM build_jobs GROUP BY state").fetchall()
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(rows)
+        return counts
+
+    def next_retry_at(self) -> float | None:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MIN(next_attempt_at) FROM build_jobs WHERE state IN ('queued', 'retrying')"
+            ).fetchone()
+        return row[0]
+
+
+class BuildWorker:
+    """Drains a BuildQueue, running up to scheduler.max_parallel builds at once."""
+
+    def __init__(self, queue: BuildQueue, scheduler: BuildScheduler):
+        self.queue = queue
+        self.scheduler = scheduler
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _slot(self, slot: int, follow: bool, poll: float) -> list[int]:
+        done = []
+        while True:
+            job = self.queue.claim(f"{self.name}:{slot}")
+            if job is None:
+                next_at = self.queue.next_retry_at()
+                if not follow and next_at is None:
+                    return done
+                if not follow and next_at > time.time() + poll:
+                    return done
+                time.sleep(poll if next_at is None else max(0.0, min(poll, next_at - time.time())))
+                continue
+            print(f"  Job {job['id']}: {job['idea_name']} (attempt {job['attempts']}/{job['max_attempts']})")
+            try:
+                result = self.scheduler.build(job["idea"])
+            except Exception as e:
+                result = {"idea": job["idea_name"], "success": False, "error": str(e)}
+            state = self.queue.complete(job, result)
+            print(f"  Job {job['id']}: {state}")
+            done.append(job["id"])
+
+    def drain(self, follow: bool = False, poll: float = 5.0) -> list[int]:
+        """Run jobs until nothing is runnable soon (or forever with `follow`).
+
+        Returns the ids of the jobs processed. Retries due within `poll`
+        seconds are waited for; later ones are left for the next run.
+        """
+        timeout = self.scheduler.timeout or 24 * 3600
+        recovered = self.queue.recover_stale(timeout + 300)
+        if recovered:
+            print(f"  Recovered {recovered} job(s) left running by a dead worker")
+        slots = self.scheduler.max_parallel
+        with ThreadPoolExecutor(max_workers=slots) as pool:
+            futures = [pool.submit(self._slot, slot, follow, poll) for slot in range(slots)]
+            return sorted(job_id for future in futures for job_id in future.result())
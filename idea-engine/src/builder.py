@@ -1,11 +1,22 @@
 """
 Bridge between idea-engine and OpenClaw's android-app-builder.
 Converts a ranked idea into a build prompt and sends it to the agent.
+
+BuildScheduler runs several agent builds at once, each in its own
+subprocess with a log file under data/build_logs/ and a timeout, and
+records the outcome on the idea in IdeaStore.
 """
 
+import itertools
 import json
+import os
+import re
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
 
@@ -45,24 +56,62 @@ def idea_to_prompt(idea: dict) -> str:
     )
 
 
+class GatewayConfig:
+    """OpenClaw's ~/.openclaw/openclaw.json, parsed once and reloaded only when
+    the file's mtime or size changes. Safe to share between build threads."""
+
+    def __init__(self, path: Path | str | None = None):
+        if path is None:
+            path = Path(os.environ.get("USERPROFILE", Path.home())) / ".openclaw" / "openclaw.json"
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._config: dict = {}
+
+    def get(self) -> dict:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._stamp, self._config = None, {}
+                return {}
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                try:
+                    self._config = json.loads(self.path.read_text(encoding="utf-8"))
+                    self._stamp = stamp
+                except (OSError, json.JSONDecodeError) as e:
+                    # Probably caught mid-write; keep the last good config and retry next time
+                    print(f"  Warning: could not read {self.path}: {e}")
+            return self._config
+
+    def token(self) -> str | None:
+        return self.get().get("gateway", {}).get("auth", {}).get("token")
+
+
+_gateway_config = GatewayConfig()
+
+
 def load_gateway_token() -> str | None:
-    """Load the OpenClaw gateway token from config."""
-    import os
-    config_path = Path(os.environ.get("USERPROFILE", Path.home())) / ".openclaw" / "openclaw.json"
-    if config_path.exists():
-        config = json.loads(config_path.read_text(encoding="utf-8"))
-        return config.get("gateway", {}).get("auth", {}).get("token")
-    return None
+    """Load the OpenClaw gateway token from config (cached until the file changes)."""
+    return _gateway_config.token()
 
 
-def send_to_openclaw(prompt: str, agent: str = "dev", dry_run: bool = False) -> bool:
-    """Send a build prompt to the OpenClaw agent."""
-    import os
+def gateway_env() -> dict:
+    """A copy of the environment with the gateway token set, for one subprocess.
 
+    os.environ itself is never modified, so concurrent builds don't share state.
+    """
+    env = os.environ.copy()
     token = load_gateway_token()
     if token:
-        os.environ["OPENCLAW_GATEWAY_TOKEN"] = token
+        env["OPENCLAW_GATEWAY_TOKEN"] = token
+    return env
+
 
+def send_to_openclaw(prompt: str, agent: str = "dev", dry_run: bool = False) -> bool:
+    """Send a build prompt to the OpenClaw agent."""
     if dry_run:
         print(f"\n{'='*60}")
         print("DRY RUN — would send this prompt to OpenClaw:")
@@ -82,33 +131,168 @@ def send_to_openclaw(prompt: str, agent: str = "dev", dry_run: bool = False) ->
     result = subprocess.run(
         ["node", str(openclaw_mjs), "agent", "--agent", agent, "--message", prompt],
         cwd=str(OPENCLAW_DIR),
+        env=gateway_env(),
         text=True,
     )
 
     return result.returncode == 0
 
 
+class BuildScheduler:
+    """Runs up to `max_parallel` OpenClaw agent builds concurrently.
+
+    Each build gets its own log file and timeout; its exit status is
+    captured and, with a `store`, written back to the idea's status
+    ("building", then "built" or "build_failed").
+
+    `command` replaces OpenClaw's agent CLI with another argv (the build
+    prompt is appended as its last argument), e.g. a stub runner for tests.
+    """
+
+    def __init__(
+        self,
+        max_parallel: int = 2,
+        timeout: float | None = 3600,
+        log_dir: str | Path = "data/build_logs",
+        openclaw_dir: str | Path = OPENCLAW_DIR,
+        agent: str = "dev",
+        store=None,
+        command: list[str] | None = None,
+    ):
+        self.max_parallel = max(1, max_parallel)
+        self.timeout = timeout
+        self.log_dir = Path(log_dir)
+        self.openclaw_dir = Path(openclaw_dir).resolve()
+        self.agent = agent
+        self.store = store
+        self.command = command
+
+    def _log_path(self, name: str) -> Path:
+        """A new, empty log file for this build.
+
+        The file is created exclusively, so builds whose names share a prefix
+        and start in the same second (in any thread or worker) get -2, -3, ...
+        """
+        slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")[:40] or "idea"
+        stamp = datetime.now(tz=timezone.utc).strftime("%Y%m%d_%H%M%S")
+        for n in itertools.count(1):
+            path = self.log_dir / (f"{stamp}_{slug}.log" if n == 1 else f"{stamp}_{slug}-{n}.log")
+            try:
+                path.open("x").close()
+                return path
+            except FileExistsError:
+                continue
+
+    def _argv(self, prompt: str) -> list[str]:
+        if self.command:
+            return [*self.command, prompt]
+        openclaw_mjs = self.openclaw_dir / "openclaw.mjs"
+        return ["node", str(openclaw_mjs), "agent", "--agent", self.agent, "--message", prompt]
+
+    def _set_status(self, name: str, status: str, note: str):
+        if self.store is not None:
+            self.store.update_status(name, status, note)
+
+    def build(self, idea: dict) -> dict:
+        """Run one build to completion; returns its result record."""
+        name = idea.get("name", "Unnamed")
+        prompt = idea_to_prompt(idea)
+        result = {"idea": name, "prompt": prompt, "success": False, "returncode": None,
+                  "timed_out": False, "log": None, "duration_s": 0.0}
+
+        if not self.command and not (self.openclaw_dir / "openclaw.mjs").exists():
+            print(f"Error: OpenClaw not found at {self.openclaw_dir}")
+            result["error"] = "openclaw.mjs not found"
+            return result
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        log_path = self._log_path(name)
+        result["log"] = str(log_path)
+        self._set_status(name, "building", f"Build started, log: {log_path}")
+        print(f"  [start] {name} (log: {log_path})")
+
+        started = time.monotonic()
+        proc = None
+        try:
+            with open(log_path, "w", encoding="utf-8") as log:
+                proc = subprocess.Popen(
+                    self._argv(prompt),
+                    cwd=str(self.openclaw_dir),
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    stdin=subprocess.DEVNULL,
+                    env=gateway_env(),
+                    text=True,
+                )
+                try:
+                    result["returncode"] = proc.wait(timeout=self.timeout)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
+                    result["timed_out"] = True
+        except Exception as e:
+            # e.g. node missing from PATH; don't leave the idea marked "building"
+            if proc is not None and proc.poll() is None:
+                proc.kill()
+            result["duration_s"] = round(time.monotonic() - started, 1)
+            result["error"] = f"{type(e).__name__}: {e}"
+            self._set_status(name, "build_failed", f"Build failed to run ({result['error']}), log: {log_path}")
+            print(f"  [FAILED] {name}: {result['error']}")
+            return result
+        result["duration_s"] = round(time.monotonic() - started, 1)
+        result["success"] = result["returncode"] == 0
+
+        if result["success"]:
+            outcome = f"exit 0 in {result['duration_s']}s"
+            self._set_status(name, "built", f"Build succeeded ({outcome}), log: {log_path}")
+        else:
+            outcome = (f"timed out after {self.timeout}s" if result["timed_out"]
+                       else f"exit {result['returncode']} in {result['duration_s']}s")
+            self._set_status(name, "build_failed", f"Build failed ({outcome}), log: {log_path}")
+        print(f"  [{'done' if result['success'] else 'FAILED'}] {name}: {outcome}")
+        return result
+
+    def run(self, ideas: list[dict]) -> list[dict]:
+        """Build every idea, at most max_parallel at a time; results keep input order."""
+        if not ideas:
+            return []
+        workers = min(self.max_parallel, len(ideas))
+        print(f"Building {len(ideas)} idea(s), {workers} at a time...")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self.build, ideas))
+
+
 def build_top_ideas(
     ranked_path: str | Path = "data/ranked_ideas.json",
-    ideas_path: str | Path = "data/ideas.json",
+    store_dir: str | Path = "data",
     n: int = 1,
     dry_run: bool = False,
     min_confidence: int = 6,
+    parallel: int = 1,
+    timeout: float | None = 3600,
+    openclaw_dir: str | Path = OPENCLAW_DIR,
+    retry_failed: bool = False,
+    command: list[str] | None = None,
 ) -> list[dict]:
-    """Load top N ideas and send each to OpenClaw for building."""
+    """Load top N ideas and build them through the persistent build queue.
+
+    Ideas already built (or waiting) under the same idempotency key are not
+    sent again; their stored result is returned with skipped=True. Failed
+    jobs are only re-queued with `retry_failed`. `command` goes to
+    BuildScheduler (a stand-in for OpenClaw's agent CLI).
+    """
+    from .storage import IdeaStore
 
     # Try ranked ideas first, fall back to ideas store
     ranked_path = Path(ranked_path)
-    ideas_path = Path(ideas_path)
 
     ideas = []
     if ranked_path.exists():
         data = json.loads(ranked_path.read_text(encoding="utf-8"))
         ideas = data.get("top_ideas", [])
-    elif ideas_path.exists():
-        data = json.loads(ideas_path.read_text(encoding="utf-8"))
-        raw = data.get("ideas", data) if isinstance(data, dict) else data
-        ideas = sorted(raw, key=lambda x: x.get("confidence", 0), reverse=True)
+    else:
+        store = IdeaStore(store_dir)
+        ideas = store.get_top(len(store))
 
     if not ideas:
         print("No ideas found. Run the full pipeline first: python -m src.cli pipeline")
@@ -121,19 +305,45 @@ def build_top_ideas(
         viable = ideas[:n]
 
     selected = viable[:n]
-    built = []
-
-    for i, idea in enumerate(selected, 1):
-        name = idea.get("name", "Unnamed")
-        conf = idea.get("confidence", "?")
-        print(f"\n{'='*60}")
-        print(f"Building idea {i}/{len(selected)}: {name} (confidence: {conf})")
-        print(f"{'='*60}")
-
-        prompt = idea_to_prompt(idea)
-        success = send_to_openclaw(prompt, dry_run=dry_run)
 
-        idea["build_status"] = "sent" if success else "failed"
-        built.append({"idea": name, "prompt": prompt, "success": success})
+    if dry_run:
+        built = []
+        for i, idea in enumerate(selected, 1):
+            name = idea.get("name", "Unnamed")
+            conf = idea.get("confidence", "?")
+            print(f"\n{'='*60}")
+            print(f"Building idea {i}/{len(selected)}: {name} (confidence: {conf})")
+            print(f"{'='*60}")
+
+            prompt = idea_to_prompt(idea)
+            success = send_to_openclaw(prompt, dry_run=True)
+            built.append({"idea": name, "prompt": prompt, "success": success})
+        return built
+
+    from .build_queue import BuildQueue, BuildWorker
+
+    scheduler = BuildScheduler(
+        max_parallel=parallel,
+        timeout=timeout,
+        log_dir=Path(store_dir) / "build_logs",
+        openclaw_dir=openclaw_dir,
+        store=IdeaStore(store_dir),
+        command=command,
+    )
+    queue = BuildQueue(Path(store_dir) / "build_queue.db", agent=scheduler.agent)
+    jobs = queue.enqueue(selected, retry_failed=retry_failed)
+    for job, created in jobs:
+        if not created:
+            print(f"  {job['idea_name']}: already {job['state']} (job {job['id']}), not queued again")
+    BuildWorker(queue, scheduler).drain()
 
+    built = []
+    for idea, (job, created) in zip(selected, jobs):
+        job = queue.get(job["id"])
+        result = dict(job["result"] or {"idea": job["idea_name"], "success": False})
+        result.update(job_id=job["id"], state=job["state"], skipped=not created)
+        if job["state"] in ("queued", "running", "retrying"):
+            result["success"] = False
+        idea["build_status"] = job["state"]
+        built.append(result)
     return built
@@ -0,0 +1,134 @@
+"""
+Offline bulk analysis through Anthropic's Message Batches API.
+
+All post batches are submitted as a single batch job, which is cheaper than
+the synchronous messages.create loop and isn't bound by per-request latency.
+The job id and its batches are persisted under data/bulk_jobs/, so an
+interrupted run can resume polling and collect the results later. Results go
+through the same _extract_json / _normalize_ideas path as live analysis and
+into IdeaStore via record_analysis.
+"""
+
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import usage
+from .analyzer import ANALYSIS_MAX_TOKENS, ANALYSIS_SYSTEM, IdeaAnalyzer, _extract_json, _normalize_ideas
+from .storage import IdeaStore
+
+
+class BulkAnalyzer:
+    """Submits, polls and collects Message Batches jobs for an IdeaAnalyzer."""
+
+    def __init__(self, analyzer: IdeaAnalyzer, job_dir: str | Path = "data/bulk_jobs"):
+        self.analyzer = analyzer
+        self.client = analyzer.client
+        self.job_dir = Path(job_dir)
+
+    def _job_file(self, job_id: str) -> Path:
+        return self.job_dir / f"{job_id}.json"
+
+    def _load_job(self, job_id: str) -> dict:
+        return json.loads(self._job_file(job_id).read_text(encoding="utf-8"))
+
+    def _save_job(self, job: dict):
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self._job_file(job["id"]).write_text(json.dumps(job, ensure_ascii=False), encoding="utf-8")
+
+    def pending_job(self) -> str | None:
+        """Id of the most recent job that was submitted but not yet collected."""
+        for path in sorted(self.job_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+            job = json.loads(path.read_text(encoding="utf-8"))
+            if job.get("status") != "collected":
+                return job["id"]
+        return None
+
+    def submit(self, posts: list[dict], batch_size: int | None = None) -> str | None:
+        """Submit every batch of posts as one Message Batches job; returns its id."""
+        batches = self.analyzer.pack_batches(posts, max_posts=batch_size)
+        if not batches:
+            return None
+
+        requests = [
+            {
+                "custom_id": f"batch-{n:05d}",
+                "params": self.analyzer._request_params(
+                    self.analyzer._batch_prompt(batch), ANALYSIS_MAX_TOKENS, system=ANALYSIS_SYSTEM,
+                ),
+            }
+            for n, batch in enumerate(batches)
+        ]
+
+        job = self.client.messages.batches.create(requests=requests)
+        self._save_job({
+            "id": job.id,
+            "status": "submitted",
+            "submitted_at": datetime.now(tz=timezone.utc).isoformat(),
+            "batches": {req["custom_id"]: batch for req, batch in zip(requests, batches)},
+            "prompts": {req["custom_id"]: req["params"]["messages"][0]["content"] for req in requests},
+        })
+        print(f"Submitted bulk job {job.id} with {len(requests)} requests ({len(posts)} posts)")
+        return job.id
+
+    def wait(self, job_id: str, poll_interval: float = 30.0, timeout: float | None = None) -> bool:
+        """Poll until the job has ended. Returns False if `timeout` runs out first."""
+        started = time.monotonic()
+        while True:
+            job = self.client.messages.batches.retrieve(job_id)
+            counts = job.request_counts
+            print(f"  Bulk job {job_id}: {job.processing_status} "
+                  f"({counts.succeeded} succeeded, {counts.errored} errored, {counts.processing} processing)")
+            if job.processing_status == "ended":
+                return True
+            if timeout is not None and time.monotonic() - started >= timeout:
+                return False
+            time.sleep(poll_interval)
+
+    def collect(self, job_id: str, store: IdeaStore) -> list[dict]:
+        """Parse an ended job's results into ideas and record them in the store."""
+        job = self._load_job(job_id)
+        all_ideas = []
+        failed = 0
+
+        for entry in self.client.messages.batches.results(job_id):
+            batch = job["batches"].get(entry.custom_id)
+            if batch is None:
+                continue
+            if entry.result.type != "succeeded":
+                print(f"  Warning: {entry.custom_id} {entry.result.type}")
+                failed += 1
+                continue
+
+            # Truncated batches stay pending and get re-packed on the next run
+            if entry.result.message.stop_reason == "max_tokens":
+                print(f"  Warning: {entry.custom_id} truncated at max_tokens")
+                failed += 1
+                continue
+
+            text = entry.result.message.content[0].text
+            try:
+                ideas = _normalize_ideas(_extract_json(text), batch)
+            except json.JSONDecodeError as e:
+                print(f"  Warning: failed to parse {entry.custom_id}: {e}")
+                failed += 1
+                continue
+
+            response_usage = getattr(entry.result.message, "usage", None)
+            self.analyzer.usage.add(response_usage)
+            usage.record(self.analyzer.model, response_usage, bulk=True)
+            if self.analyzer.cache:
+                key = self.analyzer._request_key(
+                    job["prompts"][entry.custom_id], ANALYSIS_MAX_TOKENS, system=ANALYSIS_SYSTEM,
+                )
+                self.analyzer.cache.put(key, text, model=self.analyzer.model)
+            store.record_analysis(batch, ideas)
+            all_ideas.extend(ideas)
+
+        job["status"] = "collected"
+        job["collected_at"] = datetime.now(tz=timezone.utc).isoformat()
+        job["failed_batches"] = failed
+        self._save_job(job)
+        print(f"Collected {len(all_ideas)} ideas from bulk job {job_id} ({failed} batches failed)")
+        return all_ideas
@@ -0,0 +1,117 @@
+"""
+Checkpoint manifest for the scrape → analyze → rank → build pipeline.
+
+Each stage records the hash of its inputs, the file it produced, its status
+and a few summary numbers in data/pipeline_manifest.json. `pipeline --resume`
+skips every stage that finished with the same inputs hash and whose output
+file is still there, so a failure late in the run doesn't redo the scraping
+and LLM work before it.
+"""
+
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+STAGES = ("scrape", "analyze", "rank", "build")
+
+
+def hash_inputs(*parts) -> str:
+    """Stable hash of JSON-serializable stage inputs."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_hash(path: Path | str) -> str | None:
+    path = Path(path)
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class StageRun:
+    """Handle passed to the body of PipelineManifest.stage() to report results."""
+
+    def __init__(self):
+        self.output: str | None = None
+        self.summary: dict = {}
+        self.error: str | None = None
+
+    def fail(self, reason: str):
+        """Mark the stage failed without raising, so --resume runs it again."""
+        self.error = reason
+
+
+class PipelineManifest:
+    def __init__(self, path: Path | str = Path("data") / "pipeline_manifest.json"):
+        self.path = Path(path)
+        self.data = {}
+        if self.path.exists():
+            try:
+                self.data = json.loads(self.path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                self.data = {}
+
+    def start(self, resume: bool = False):
+        """Begin a run; without `resume` the previous run's checkpoints are discarded."""
+        now = datetime.now(tz=timezone.utc).isoformat()
+        if not resume or not self.data.get("stages"):
+            self.data = {"started_at": now, "stages": {}}
+        self.data["resumed_at"] = now if resume else None
+        self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def completed(self, name: str, inputs_hash: str) -> dict | None:
+        """The stage's checkpoint if it finished with these inputs and its output still exists."""
+        entry = self.data.get("stages", {}).get(name)
+        if not entry or entry.get("status") != "done" or entry.get("inputs_hash") != inputs_hash:
+            return None
+        if entry.get("output") and not Path(entry["output"]).exists():
+            return None
+        return entry
+
+    @contextmanager
+    def stage(self, name: str, inputs_hash: str):
+        """Record a stage as running, then done (with output and summary) or failed.
+
+        sys.exit() inside the block counts as a failure too.
+        """
+        run = StageRun()
+        entry = {
+            "status": "running",
+            "inputs_hash": inputs_hash,
+            "started_at": datetime.now(tz=timezone.utc).isoformat(),
+        }
+        self.data.setdefault("stages", {})[name] = entry
+        # Later stages depend on this one's output, so their checkpoints are stale now
+        for later in STAGES[STAGES.index(name) + 1:] if name in STAGES else ():
+            self.data["stages"].pop(later, None)
+        self._save()
+
+        try:
+            yield run
+        except BaseException as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e) or type(e).__name__
+            entry["finished_at"] = datetime.now(tz=timezone.utc).isoformat()
+            self._save()
+            raise
+
+        entry["status"] = "failed" if run.error else "done"
+        if run.error:
+            entry["error"] = run.error
+        entry["output"] = run.output
+        entry["summary"] = run.summary
+        entry["finished_at"] = datetime.now(tz=timezone.utc).isoformat()
+        self._save()
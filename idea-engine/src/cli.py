@@ -4,12 +4,15 @@ CLI entry point for the idea engine.
 Usage:
   python -m src.cli scrape                    # Scrape Reddit for pain points
   python -m src.cli scrape --subreddits fitness,ADHD
-  python -m src.cli analyze                   # Analyze latest scrape with LLM
+  python -m src.cli analyze                   # Analyze top posts in the scrape corpus
   python -m src.cli analyze --file data/raw_scrape_20260221.json
+  python -m src.cli analyze --bulk            # Backfill the whole corpus via the Batches API
   python -m src.cli rank                      # Rank and consolidate all ideas
   python -m src.cli evaluate "workout app that uses AI to adjust rest times"
   python -m src.cli status                    # Show idea pipeline summary
   python -m src.cli top                       # Show top 10 ideas
+  python -m src.cli pipeline --resume         # Continue a failed pipeline run
+  python -m src.cli usage                     # Tokens, cost and latency per run/day/stage
 """
 
 import argparse
@@ -20,21 +23,66 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from . import usage
+from .cli_common import add_usage_parser, cmd_usage, print_cache_stats, print_http_stats, response_cache
+
 load_dotenv(Path(__file__).parent.parent / ".env")
 
 
 def cmd_scrape(args):
     from .reddit_scraper import MultiScraper
 
-    scraper = MultiScraper()
+    scraper = MultiScraper(hn_concurrency=args.concurrency or 8)
     keywords = args.keywords.split(",") if args.keywords else None
     include_google = not args.no_google
 
     print(f"Scraping for pain points (google={'on' if include_google else 'off'})...\n")
-    results = scraper.scrape_all(keywords, include_google=include_google, time_range=args.time or "month")
-    filepath = scraper.save_raw(results, "data")
-    print(f"\nDone! {len(results)} posts saved to {filepath}")
-    print(f"Next: python -m src.cli analyze --file {filepath}")
+    results = scraper.scrape_all(
+        keywords, include_google=include_google, time_range=args.time or "month", incremental=not args.full,
+    )
+    scraper.save_raw(results, "data")
+    print(f"\nDone! {len(results)} posts scraped")
+    print_http_stats()
+    print("Next: python -m src.cli analyze")
+
+
+def _analyze_bulk(args, api_key: str):
+    """analyze --bulk: push the whole backlog through one Message Batches job."""
+    from .analyzer import IdeaAnalyzer
+    from .bulk import BulkAnalyzer
+    from .storage import IdeaStore
+
+    store = IdeaStore()
+    bulk = BulkAnalyzer(IdeaAnalyzer(api_key, cache=response_cache(args), token_budget=args.token_budget))
+
+    job_id = bulk.pending_job()
+    if job_id:
+        print(f"Resuming bulk job {job_id}")
+    else:
+        if args.file:
+            with open(args.file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            posts = data.get("posts", data) if isinstance(data, dict) else data
+        else:
+            from .corpus import open_corpus
+            posts = list(open_corpus("data").iter_posts())
+        if not args.reanalyze:
+            posts = store.pending_posts(posts)
+        if not posts:
+            print("Nothing new to analyze.")
+            return
+        job_id = bulk.submit(posts, batch_size=args.batch)
+
+    if args.no_wait:
+        print("Job submitted. Re-run 'analyze --bulk' later to collect it.")
+        return
+
+    bulk.wait(job_id, poll_interval=args.poll)
+    before = len(store)
+    ideas = bulk.collect(job_id, store)
+    store.export_json()
+    print(f"\nExtracted {len(ideas)} ideas, {len(store) - before} new ones added to store")
+    print("Next: python -m src.cli rank")
 
 
 def cmd_analyze(args):
@@ -46,29 +94,40 @@ def cmd_analyze(args):
         print("Error: Set ANTHROPIC_API_KEY in .env")
         sys.exit(1)
 
+    if args.bulk:
+        _analyze_bulk(args, api_key)
+        return
+
     if args.file:
-        filepath = Path(args.file)
+        with open(args.file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        posts = data.get("posts", data) if isinstance(data, dict) else data
+        top_posts = sorted(posts, key=lambda x: x.get("score", 0), reverse=True)[:args.limit or 30]
     else:
-        data_dir = Path("data")
-        files = sorted(data_dir.glob("raw_scrape_*.json"), reverse=True)
-        if not files:
-            print("No scrape files found. Run 'scrape' first.")
+        from .corpus import open_corpus
+        corpus = open_corpus("data")
+        if not len(corpus):
+            print("No scraped posts found. Run 'scrape' first.")
             sys.exit(1)
-        filepath = files[0]
-        print(f"Using latest scrape: {filepath}")
-
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    posts = data.get("posts", data) if isinstance(data, dict) else data
+        print(f"Using scrape corpus: {len(corpus)} unique posts")
+        top_posts = corpus.top_posts(args.limit or 30)
 
-    top_posts = sorted(posts, key=lambda x: x.get("score", 0), reverse=True)[:args.limit or 30]
     print(f"Analyzing top {len(top_posts)} posts...")
 
-    analyzer = IdeaAnalyzer(api_key)
-    analyses = analyzer.analyze_posts(top_posts, batch_size=args.batch or 5)
-
     store = IdeaStore()
-    added = store.add_ideas(analyses) if analyses else 0
+    before = len(store)
+    cache = response_cache(args)
+    analyzer = IdeaAnalyzer(
+        api_key, max_concurrency=args.concurrency or 4, cache=cache, token_budget=args.token_budget,
+    )
+    memo = None if args.reanalyze else store
+    analyses = analyzer.analyze_posts(top_posts, batch_size=args.batch, memo=memo, stream=args.stream)
+    print_cache_stats(cache, analyzer)
+
+    if memo is None and analyses:
+        store.add_ideas(analyses)
+    added = len(store) - before
+    store.export_json()
     print(f"\nExtracted {len(analyses)} ideas, {added} new ones added to store")
     print(f"Next: python -m src.cli rank")
 
@@ -83,13 +142,19 @@ def cmd_rank(args):
         sys.exit(1)
 
     store = IdeaStore()
-    if not store.ideas:
+    merged = store.consolidate()
+    if merged:
+        print(f"Merged {merged} near-duplicate ideas")
+    ideas = store.ideas
+    if not ideas:
         print("No ideas in store. Run 'scrape' then 'analyze' first.")
         sys.exit(1)
 
-    print(f"Ranking {len(store.ideas)} ideas...")
-    analyzer = IdeaAnalyzer(api_key)
-    ranked = analyzer.rank_ideas(store.ideas)
+    print(f"Ranking {len(ideas)} ideas...")
+    cache = response_cache(args)
+    analyzer = IdeaAnalyzer(api_key, cache=cache)
+    ranked = analyzer.rank_ideas(ideas)
+    print_cache_stats(cache, analyzer)
 
     output = Path("data") / "ranked_ideas.json"
     with open(output, "w", encoding="utf-8") as f:
@@ -126,7 +191,7 @@ def cmd_evaluate(args):
     idea = " ".join(args.idea)
     print(f"Evaluating: {idea}\n")
 
-    analyzer = IdeaAnalyzer(api_key)
+    analyzer = IdeaAnalyzer(api_key, cache=response_cache(args))
     result = analyzer.quick_evaluate(idea)
 
     print(json.dumps(result, indent=2))
@@ -173,71 +238,174 @@ def cmd_top(args):
 def cmd_build(args):
     from .builder import build_top_ideas
 
+    if args.worker:
+        from .build_queue import BuildQueue, BuildWorker
+        from .builder import BuildScheduler
+        from .storage import IdeaStore
+
+        queue = BuildQueue(Path("data") / "build_queue.db")
+        scheduler = BuildScheduler(max_parallel=args.parallel, timeout=args.timeout, store=IdeaStore())
+        print(f"Build worker draining data/build_queue.db ({args.parallel} slot(s), follow: {args.follow})...\n")
+        try:
+            processed = BuildWorker(queue, scheduler).drain(follow=args.follow, poll=args.poll)
+        except KeyboardInterrupt:
+            processed = []
+            print("\nStopped.")
+        counts = queue.counts()
+        print(f"\nProcessed {len(processed)} job(s). Queue: "
+              + ", ".join(f"{state} {count}" for state, count in counts.items()))
+        return
+
     n = args.n or 1
     dry_run = args.dry_run
     min_conf = args.min_confidence or 6
 
     print(f"Building top {n} idea(s) (min confidence: {min_conf}, dry_run: {dry_run})...\n")
-    results = build_top_ideas(n=n, dry_run=dry_run, min_confidence=min_conf)
+    results = build_top_ideas(
+        n=n, dry_run=dry_run, min_confidence=min_conf, parallel=args.parallel, timeout=args.timeout,
+        retry_failed=args.retry_failed,
+    )
 
     if results:
         print(f"\n=== Build Summary ===")
         for r in results:
-            status = "SENT" if r["success"] else "FAILED"
-            print(f"  [{status}] {r['idea']}")
+            status = "SENT" if r["success"] else r.get("state", "failed").upper()
+            print(f"  [{status}] {r['idea']}{' (already queued/built)' if r.get('skipped') else ''}")
 
 
 def cmd_pipeline(args):
-    """Full autonomous pipeline: scrape → analyze → rank → build."""
+    """Full autonomous pipeline: scrape → analyze → rank → build.
+
+    Each stage is checkpointed in data/pipeline_manifest.json; with --resume,
+    stages that already finished on the same inputs are skipped.
+    """
+    from .checkpoint import PipelineManifest, file_hash, hash_inputs
+    from .corpus import content_hash, open_corpus, post_key
 
     print("=" * 60)
     print("  IDEA ENGINE — FULL AUTONOMOUS PIPELINE")
     print("=" * 60)
 
-    # Step 1: Scrape
-    print("\n>>> STEP 1/4: Scraping for pain points...\n")
-    from .reddit_scraper import MultiScraper
-    scraper = MultiScraper()
-    keywords = args.keywords.split(",") if args.keywords else None
-    results = scraper.scrape_all(keywords, include_google=not args.no_google, time_range=args.time or "month")
-    filepath = scraper.save_raw(results, "data")
+    manifest = PipelineManifest(Path("data") / "pipeline_manifest.json")
+    manifest.start(resume=args.resume)
 
-    if len(results) < 5:
-        print(f"\nOnly found {len(results)} posts — not enough data. Try different keywords.")
-        sys.exit(1)
+    def skipped(name: str, inputs_hash: str) -> dict | None:
+        entry = manifest.completed(name, inputs_hash) if args.resume else None
+        if entry:
+            print(f"  Skipping: completed at {entry.get('finished_at')} with the same inputs")
+        return entry
 
-    # Step 2: Analyze
-    print("\n>>> STEP 2/4: Analyzing posts with Claude...\n")
     api_key = os.environ.get("ANTHROPIC_API_KEY")
     if not api_key:
         print("Error: Set ANTHROPIC_API_KEY in .env")
         sys.exit(1)
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    posts = data.get("posts", [])
-    top_posts = sorted(posts, key=lambda x: x.get("score", 0), reverse=True)[:30]
-
-    from .analyzer import IdeaAnalyzer
-    analyzer = IdeaAnalyzer(api_key)
-    analyses = analyzer.analyze_posts(top_posts, batch_size=5)
-
+    from .analyzer import RANK_FIELDS, IdeaAnalyzer
+    from .prompt_encoding import project
     from .storage import IdeaStore
     store = IdeaStore()
-    added = store.add_ideas(analyses)
-    print(f"\nExtracted {len(analyses)} ideas, {added} new")
+    cache = response_cache(args)
+    analyzer = IdeaAnalyzer(api_key, cache=cache)
 
-    if not store.ideas:
-        print("No ideas extracted. Check your API key and try again.")
+    # Step 1: Scrape (with --stream, the 30 best new posts by score are analyzed in
+    # the same pass, with ideas stored as each batch completes)
+    print("\n>>> STEP 1/4: Scraping for pain points...\n")
+    keywords = args.keywords.split(",") if args.keywords else None
+    inputs = hash_inputs(keywords, args.time or "month", args.no_google)
+    done = skipped("scrape", inputs)
+    streamed_keys = None
+    if done:
+        posts_scraped = done["summary"].get("posts", 0)
+        streamed_keys = done["summary"].get("streamed_posts")
+    else:
+        with manifest.stage("scrape", inputs) as stage:
+            from .reddit_scraper import MultiScraper
+            scraper = MultiScraper(hn_concurrency=args.concurrency or 8)
+            scrape_kwargs = dict(
+                keywords=keywords, include_google=not args.no_google, time_range=args.time or "month",
+                incremental=not args.full,
+            )
+            if args.stream:
+                from .streaming import StreamingPipeline
+                usage.set_stage("stream")
+                streaming = StreamingPipeline(scraper, analyzer, store, max_posts=30)
+                counts = streaming.run(**scrape_kwargs)
+                results = streaming.scraped
+                streamed_keys = [post_key(p) for p in streaming.streamed]
+                stage.summary["streamed"] = counts
+                stage.summary["streamed_posts"] = streamed_keys
+                print(f"\nAnalyzed {counts['analyzed']} new posts while scraping: "
+                      f"{counts['ideas']} ideas, {counts['added']} new")
+            else:
+                results = scraper.scrape_all(**scrape_kwargs)
+            corpus_dir = scraper.save_raw(results, "data")
+            posts_scraped = len(results)
+            print_http_stats()
+            stage.output = str(Path(corpus_dir) / "index.json")
+            stage.summary["posts"] = posts_scraped
+
+    # Incremental runs may find few new posts; judge by the whole corpus
+    corpus = open_corpus("data")
+
+    if len(corpus) < 5:
+        print(f"\nOnly found {len(corpus)} posts — not enough data. Try different keywords.")
         sys.exit(1)
 
+    # Step 2: Analyze the corpus's top posts. After --stream, analyze exactly the
+    # posts that were streamed instead (all memo hits), so a run never pays for a
+    # second, differently chosen set of 30.
+    print("\n>>> STEP 2/4: Analyzing posts with Claude...\n")
+    usage.set_stage("analyze")
+    if args.stream and streamed_keys is not None:
+        wanted = set(streamed_keys)
+        top_posts = [p for p in corpus.iter_posts() if post_key(p) in wanted]
+    else:
+        top_posts = corpus.top_posts(30)
+
+    inputs = hash_inputs([(post_key(p), content_hash(p)) for p in top_posts])
+    done = skipped("analyze", inputs)
+    if done:
+        ideas_found = done["summary"].get("ideas", 0)
+    else:
+        with manifest.stage("analyze", inputs) as stage:
+            before = len(store)
+            analyses = analyzer.analyze_posts(top_posts, memo=store)
+            added = len(store) - before
+            merged = store.consolidate()
+            if merged:
+                print(f"Merged {merged} near-duplicate ideas")
+            stage.output = str(store.export_json())
+            ideas_found = len(analyses)
+            stage.summary.update(ideas=ideas_found, added=added)
+            print(f"\nExtracted {ideas_found} ideas, {added} new")
+
+            if not len(store):
+                print("No ideas extracted. Check your API key and try again.")
+                sys.exit(1)
+
     # Step 3: Rank
     print("\n>>> STEP 3/4: Ranking ideas...\n")
-    ranked = analyzer.rank_ideas(store.ideas)
-
+    usage.set_stage("rank")
     output = Path("data") / "ranked_ideas.json"
-    with open(output, "w", encoding="utf-8") as f:
-        json.dump(ranked, f, indent=2, ensure_ascii=False)
+    ideas = store.ideas
+    # Only what the ranking sees; status and notes edits don't invalidate it
+    inputs = hash_inputs([project({**idea, "ref": ref}, RANK_FIELDS) for ref, idea in enumerate(ideas)])
+    if skipped("rank", inputs):
+        with open(output, "r", encoding="utf-8") as f:
+            ranked = json.load(f)
+    else:
+        with manifest.stage("rank", inputs) as stage:
+            ranked = analyzer.rank_ideas(ideas)
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(ranked, f, indent=2, ensure_ascii=False)
+            stage.output = str(output)
+            stage.summary["top_ideas"] = len(ranked.get("top_ideas", []))
+            if ranked.get("error"):
+                # Fallback ordering only; don't let --resume treat it as a finished ranking
+                print("Continuing with ideas ordered by confidence")
+                stage.fail(f"ranking failed: {ranked['error']}")
+
+    print_cache_stats(cache, analyzer)
 
     top_ideas = ranked.get("top_ideas", [])
     if top_ideas:
@@ -253,19 +421,37 @@ def cmd_pipeline(args):
     dry_run = args.dry_run
 
     print(f"\n>>> STEP 4/4: Building top {n} idea(s)...\n")
-    from .builder import build_top_ideas
-    build_results = build_top_ideas(n=n, dry_run=dry_run, min_confidence=args.min_confidence or 6)
+    build_output = Path("data") / "build_results.json"
+    inputs = hash_inputs(file_hash(output), n, dry_run, args.min_confidence or 6)
+    done = skipped("build", inputs)
+    if done:
+        with open(build_output, "r", encoding="utf-8") as f:
+            build_results = json.load(f)
+    else:
+        with manifest.stage("build", inputs) as stage:
+            from .builder import build_top_ideas
+            build_results = build_top_ideas(
+                n=n, dry_run=dry_run, min_confidence=args.min_confidence or 6,
+                parallel=args.build_parallel, timeout=args.build_timeout,
+            )
+            with open(build_output, "w", encoding="utf-8") as f:
+                json.dump(build_results, f, indent=2, ensure_ascii=False)
+            stage.output = str(build_output)
+            stage.summary["builds"] = len(build_results)
+            failed = [r["idea"] for r in build_results if not r["success"]]
+            if failed:
+                stage.fail(f"builds failed: {', '.join(failed)}")
 
     print(f"\n{'='*60}")
     print("  PIPELINE COMPLETE")
     print(f"{'='*60}")
-    print(f"  Posts scraped:  {len(results)}")
-    print(f"  Ideas found:   {len(analyses)}")
+    print(f"  Posts scraped:  {posts_scraped}")
+    print(f"  Ideas found:   {ideas_found}")
     print(f"  Ideas ranked:  {len(top_ideas)}")
     print(f"  Builds sent:   {len(build_results)}")
     for r in build_results:
-        status = "SENT" if r["success"] else "FAILED"
-        print(f"    [{status}] {r['idea']}")
+        status = "SENT" if r["success"] else r.get("state", "failed").upper()
+        print(f"    [{status}] {r['idea']}{' (already queued/built)' if r.get('skipped') else ''}")
     print()
 
 
@@ -277,16 +463,28 @@ def main():
     scrape_p.add_argument("--keywords", help="Comma-separated custom keywords to search for")
     scrape_p.add_argument("--time", default="month", help="Time filter: day/week/month/year")
     scrape_p.add_argument("--no-google", action="store_true", help="Skip Google/Reddit search (HN only)")
+    scrape_p.add_argument("--concurrency", type=int, default=8, help="Max concurrent HN requests (1 = serial)")
+    scrape_p.add_argument("--full", action="store_true", help="Ignore saved HN cursors and rescan the whole window")
 
     analyze_p = subparsers.add_parser("analyze", help="Analyze scraped posts with LLM")
-    analyze_p.add_argument("--file", help="Specific scrape file to analyze")
+    analyze_p.add_argument("--file", help="Analyze a legacy raw_scrape JSON file instead of the corpus")
     analyze_p.add_argument("--limit", type=int, default=30, help="Max posts to analyze")
-    analyze_p.add_argument("--batch", type=int, default=5, help="Posts per LLM call")
-
-    subparsers.add_parser("rank", help="Rank and consolidate all ideas")
+    analyze_p.add_argument("--batch", type=int, help="Max posts per LLM call (default: fill the token budget)")
+    analyze_p.add_argument("--token-budget", type=int, default=12000, help="Estimated input tokens per LLM call")
+    analyze_p.add_argument("--concurrency", type=int, default=4, help="Max LLM requests in flight")
+    analyze_p.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+    analyze_p.add_argument("--reanalyze", action="store_true", help="Re-send posts that were already analyzed")
+    analyze_p.add_argument("--stream", action="store_true", help="Stream responses and store each idea as it completes")
+    analyze_p.add_argument("--bulk", action="store_true", help="Analyze the whole corpus via the Message Batches API")
+    analyze_p.add_argument("--no-wait", action="store_true", help="With --bulk: submit the job and exit")
+    analyze_p.add_argument("--poll", type=float, default=30.0, help="With --bulk: seconds between status polls")
+
+    rank_p = subparsers.add_parser("rank", help="Rank and consolidate all ideas")
+    rank_p.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
 
     eval_p = subparsers.add_parser("evaluate", help="Quick-evaluate a single idea")
     eval_p.add_argument("idea", nargs="+", help="The app idea to evaluate")
+    eval_p.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
 
     subparsers.add_parser("status", help="Show idea pipeline summary")
 
@@ -297,14 +495,29 @@ def main():
     build_p.add_argument("-n", type=int, default=1, help="Number of top ideas to build")
     build_p.add_argument("--dry-run", action="store_true", help="Show prompts without sending")
     build_p.add_argument("--min-confidence", type=int, default=6, help="Minimum confidence to build")
+    build_p.add_argument("--parallel", type=int, default=1, help="Max OpenClaw builds running at once")
+    build_p.add_argument("--timeout", type=float, default=3600, help="Seconds before a build is killed")
+    build_p.add_argument("--retry-failed", action="store_true", help="Re-queue ideas whose builds failed or await a retry")
+    build_p.add_argument("--worker", action="store_true", help="Only drain jobs already in data/build_queue.db")
+    build_p.add_argument("--follow", action="store_true", help="With --worker, keep polling for new jobs")
+    build_p.add_argument("--poll", type=float, default=5.0, help="Seconds between queue polls")
 
     pipe_p = subparsers.add_parser("pipeline", help="Full auto: scrape → analyze → rank → build")
     pipe_p.add_argument("--keywords", help="Comma-separated custom keywords")
     pipe_p.add_argument("--time", default="month", help="Time filter: day/week/month/year")
     pipe_p.add_argument("--no-google", action="store_true", help="Skip Google/Reddit (HN only)")
+    pipe_p.add_argument("--concurrency", type=int, default=8, help="Max concurrent HN requests (1 = serial)")
+    pipe_p.add_argument("--full", action="store_true", help="Ignore saved HN cursors and rescan the whole window")
     pipe_p.add_argument("--build-top", type=int, default=1, help="How many top ideas to build")
     pipe_p.add_argument("--dry-run", action="store_true", help="Show build prompts without sending")
     pipe_p.add_argument("--min-confidence", type=int, default=6, help="Minimum confidence to build")
+    pipe_p.add_argument("--build-parallel", type=int, default=1, help="Max OpenClaw builds running at once")
+    pipe_p.add_argument("--build-timeout", type=float, default=3600, help="Seconds before a build is killed")
+    pipe_p.add_argument("--no-cache", action="store_true", help="Bypass the LLM response cache")
+    pipe_p.add_argument("--resume", action="store_true", help="Skip stages that completed in the last run")
+    pipe_p.add_argument("--stream", action="store_true", help="Analyze the best new posts in the scrape pass, storing ideas per batch")
+
+    add_usage_parser(subparsers)
 
     args = parser.parse_args()
 
@@ -317,9 +530,12 @@ def main():
         "top": cmd_top,
         "build": cmd_build,
         "pipeline": cmd_pipeline,
+        "usage": cmd_usage,
     }
 
     if args.command in commands:
+        if args.command != "usage":
+            usage.start_run(args.command)
         commands[args.command](args)
     else:
         parser.print_help()
@@ -0,0 +1,126 @@
+"""
+Append-only corpus of scraped posts.
+
+Each scrape appends one gzip-compressed JSONL segment under data/corpus/
+holding only posts that are new or whose content changed. An index maps
+"source:id" to the segment with the current copy and its content hash, so
+disk usage and load time grow with unique posts rather than with runs.
+"""
+
+import gzip
+import hashlib
+import heapq
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+
+def post_key(post: dict) -> str:
+    return f"{post.get('source', 'unknown')}:{post.get('id', '')}"
+
+
+def content_hash(post: dict) -> str:
+    """Hash of the fields that identify a post's content (score/comment counts excluded)."""
+    payload = json.dumps(
+        [post.get("title", ""), post.get("body", ""), post.get("url", "")],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ScrapeCorpus:
+    """Append-only store of scraped posts, deduplicated by (source, id)."""
+
+    def __init__(self, data_dir: str | Path = "data"):
+        self.root = Path(data_dir) / "corpus"
+        self.index_file = self.root / "index.json"
+        self.index = self._load_index()
+
+    def _load_index(self) -> dict:
+        if self.index_file.exists():
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("posts", {})
+        return {}
+
+    def _save_index(self):
+        tmp_path = self.index_file.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "updated_at": datetime.now(tz=timezone.utc).isoformat(),
+                "total": len(self.index),
+                "posts": self.index,
+            }, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.index_file)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def segments(self) -> list[Path]:
+        return sorted(self.root.glob("segment_*.jsonl.gz"))
+
+    def append(self, posts: list[dict]) -> int:
+        """Append new or changed posts as a new segment. Returns how many were written."""
+        fresh = {}
+        for post in posts:
+            key = post_key(post)
+            digest = content_hash(post)
+            entry = self.index.get(key)
+            if entry and entry["hash"] == digest:
+                continue
+            fresh[key] = (post, digest)
+
+        if not fresh:
+            return 0
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        existing = self.segments()
+        seq = int(existing[-1].name.split("_")[1].split(".")[0]) + 1 if existing else 1
+        segment = self.root / f"segment_{seq:06d}.jsonl.gz"
+
+        # Write the segment fully before the index points at it
+        tmp_path = segment.with_suffix(".gz.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for post, _ in fresh.values():
+                f.write(json.dumps(post, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, segment)
+
+        for key, (_, digest) in fresh.items():
+            self.index[key] = {"segment": segment.name, "hash": digest}
+        self._save_index()
+        return len(fresh)
+
+    def iter_posts(self) -> Iterator[dict]:
+        """Stream the current copy of every post across all segments."""
+        for segment in self.segments():
+            with gzip.open(segment, "rt", encoding="utf-8") as f:
+                for line in f:
+                    post = json.loads(line)
+                    entry = self.index.get(post_key(post))
+                    if entry and entry["segment"] == segment.name:
+                        yield post
+
+    def top_posts(self, n: int) -> list[dict]:
+        """Highest-scoring N posts, without loading the whole corpus into memory."""
+        return heapq.nlargest(n, self.iter_posts(), key=lambda x: x.get("score", 0))
+
+    def import_legacy(self, data_dir: str | Path = "data") -> int:
+        """One-shot import of old raw_scrape_*.json dumps, oldest first."""
+        added = 0
+        for filepath in sorted(Path(data_dir).glob("raw_scrape_*.json")):
+            with open(filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            posts = data.get("posts", data) if isinstance(data, dict) else data
+            added += self.append(posts)
+        return added
+
+
+def open_corpus(data_dir: str | Path = "data") -> ScrapeCorpus:
+    """Open the corpus, importing legacy raw_scrape dumps the first time."""
+    corpus = ScrapeCorpus(data_dir)
+    if not corpus.index_file.exists() and any(Path(data_dir).glob("raw_scrape_*.json")):
+        print("Importing legacy raw_scrape files into the corpus...")
+        added = corpus.import_legacy(data_dir)
+        print(f"  Imported {added} unique posts")
+    return corpus
@@ -0,0 +1,325 @@
+# Generated from engine-shared/http_client.py by engine-shared/sync.py. Edit that file, not this copy.
+"""
+Shared HTTP client with keep-alive connection pooling.
+
+urllib.request.urlopen opens a new TCP (and TLS) connection for every
+request, so many small calls to the same API spend most of their time in
+handshakes. HttpClient keeps idle http.client connections per
+(scheme, host, port) and reuses them across requests and threads, asks for
+gzip/deflate and decodes it, follows redirects, retries connection errors,
+429s and 5xx responses with exponential backoff, and counts requests,
+retries, connection reuse, bytes and latency per host.
+
+Proxies are honored the way urllib.request does it: HTTP_PROXY/HTTPS_PROXY
+(via urllib.request.getproxies(), or an explicit `proxies` mapping) apply
+unless NO_PROXY matches the host (proxy_bypass). https requests are tunneled
+through the proxy with CONNECT; plain http requests are sent to the proxy
+with the absolute URL as the request target. Credentials in the proxy URL
+go out as Proxy-Authorization. Pooled connections are keyed by proxy too,
+so a proxied and a direct connection to the same host are never mixed.
+
+Use default_client() to share one pool across the whole process.
+"""
+
+import base64
+import gzip
+import http.client
+import json
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+import zlib
+from collections import defaultdict
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+
+
+class HTTPError(Exception):
+    """A response with status >= 400 (after any retries)."""
+
+    def __init__(self, url: str, status: int, reason: str, body: bytes = b""):
+        super().__init__(f"HTTP {status} {reason} for {url}")
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+
+class Response:
+    def __init__(self, url: str, status: int, reason: str, headers: dict, body: bytes):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def text(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        return self.body.decode(encoding, errors=errors)
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+
+def _decode(body: bytes, encoding: str) -> bytes:
+    encoding = encoding.strip().lower()
+    if encoding in ("gzip", "x-gzip"):
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send a raw deflate stream without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+class HttpClient:
+    """Thread-safe pooled HTTP/1.1 client. Each connection is used by one request at a time."""
+
+    def __init__(
+        self,
+        timeout: float = 15,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_idle_per_host: int = 8,
+        proxies: dict[str, str] | None = None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_idle_per_host = max_idle_per_host
+        # scheme -> proxy URL; None reads HTTP(S)_PROXY from the environment like urllib
+        self.proxies = urllib.request.getproxies() if proxies is None else proxies
+
+        self._ssl_context = ssl.create_default_context()
+        self._idle: dict[tuple, list[http.client.HTTPConnection]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._metrics: dict[str, dict] = defaultdict(lambda: {
+            "requests": 0, "errors": 0, "retries": 0, "connections": 0, "reused": 0,
+            "bytes": 0, "latency_s": 0.0,
+        })
+
+    def _proxy_for(self, scheme: str, host: str) -> str | None:
+        """Proxy URL to use for `host`, or None to connect directly."""
+        proxy = self.proxies.get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        return proxy if "://" in proxy else f"http://{proxy}"
+
+    @staticmethod
+    def _proxy_headers(proxy: str) -> dict:
+        parts = urllib.parse.urlsplit(proxy)
+        if parts.username is None:
+            return {}
+        credentials = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+        return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")}
+
+    def _new_connection(self, key: tuple, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port, proxy = key
+        with self._lock:
+            self._metrics[host]["connections"] += 1
+        connect_host, connect_port = host, port
+        if proxy:
+            proxy_parts = urllib.parse.urlsplit(proxy)
+            connect_host, connect_port = proxy_parts.hostname, proxy_parts.port or 80
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(connect_host, connect_port, timeout=timeout, context=self._ssl_context)
+            if proxy:
+                conn.set_tunnel(host, port, headers=self._proxy_headers(proxy))
+            return conn
+        return http.client.HTTPConnection(connect_host, connect_port, timeout=timeout)
+
+    def _connection(self, key: tuple, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        """An idle pooled connection if there is one (reused=True), else a new one."""
+        with self._lock:
+            idle = self._idle[key]
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        return self._new_connection(key, timeout), False
+
+    def _release(self, key: tuple, conn: http.client.HTTPConnection):
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _send(
+        self, method: str, url: str, headers: dict, body: bytes | None, timeout: float
+    ) -> tuple[int, str, dict, bytes]:
+        """One HTTP exchange over a pooled connection; returns status, reason, headers, decoded body."""
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        proxy = self._proxy_for(scheme, parts.hostname)
+        key = (scheme, parts.hostname, port, proxy)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        if proxy and scheme == "http":
+            # A forward proxy takes the absolute URL; https goes through the CONNECT tunnel instead
+            path = urllib.parse.urlunsplit((scheme, parts.netloc, path, "", ""))
+            headers = {**headers, **self._proxy_headers(proxy)}
+
+        conn, reused = self._connection(key, timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            conn.close()
+            if not reused:
+                raise
+            # The server closed an idle keep-alive connection; retry once on a fresh one
+            conn, reused = self._new_connection(key, timeout), False
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                raw = resp.read()
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        with self._lock:
+            metrics = self._metrics[parts.hostname]
+            metrics["reused"] += reused
+            metrics["bytes"] += len(raw)
+
+        response_headers = {name.lower(): value for name, value in resp.getheaders()}
+        body_out = _decode(raw, response_headers.get("content-encoding", ""))
+        return resp.status, resp.reason, response_headers, body_out
+
+    def _delay(self, attempt: int, headers: dict | None = None) -> float:
+        retry_after = (headers or {}).get("retry-after", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), 60.0)
+        return self.backoff * 2 ** attempt
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict | None = None,
+        body: bytes | None = None,
+        timeout: float | None = None,
+        retries: int | None = None,
+    ) -> Response:
+        """Send a request, following redirects and retrying transient failures.
+
+        Raises HTTPError for a final status >= 400, or the last connection
+        error once retries are exhausted.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        send_headers = {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive", **(headers or {})}
+        host = urllib.parse.urlsplit(url).hostname
+
+        started = time.monotonic()
+        attempt = 0
+        redirects = 0
+        try:
+            while True:
+                try:
+                    status, reason, response_headers, data = self._send(method, url, send_headers, body, timeout)
+                except (OSError, http.client.HTTPException):
+                    if attempt >= retries:
+                        raise
+                    time.sleep(self._delay(attempt))
+                    attempt += 1
+                    with self._lock:
+                        self._metrics[host]["retries"] += 1
+                    continue
+
+                if status in REDIRECT_STATUSES and "location" in response_headers and redirects < MAX_REDIRECTS:
+                    url = urllib.parse.urljoin(url, response_headers["location"])
+                    redirects += 1
+                    if status == 303 or (status in (301, 302) and method == "POST"):
+                        method, body = "GET", None
+                    continue
+                if status in RETRY_STATUSES and attempt < retries:
+                    time.sleep(self._delay(attempt, response_headers))
+                    attempt += 1
+                    with self._lock:
+                        self._metrics[host]["retries"] += 1
+                    continue
+                if status >= 400:
+                    raise HTTPError(url, status, reason, data)
+                return Response(url, status, reason, response_headers, data)
+        except Exception:
+            with self._lock:
+                self._metrics[host]["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                metrics = self._metrics[host]
+                metrics["requests"] += 1
+                metrics["latency_s"] += time.monotonic() - started
+
+    def get(self, url: str, headers: dict | None = None, timeout: float | None = None) -> Response:
+        return self.request("GET", url, headers=headers, timeout=timeout)
+
+    def get_json(self, url: str, headers: dict | None = None, timeout: float | None = None):
+        return self.get(url, headers={"Accept": "application/json", **(headers or {})}, timeout=timeout).json()
+
+    def post_json(self, url: str, payload, headers: dict | None = None, timeout: float | None = None):
+        body = json.dumps(payload).encode("utf-8")
+        response = self.request(
+            "POST", url,
+            headers={"Content-Type": "application/json", "Accept": "application/json", **(headers or {})},
+            body=body, timeout=timeout,
+        )
+        return response.json()
+
+    def metrics(self) -> dict[str, dict]:
+        """Per-host counters: requests, errors, retries, connections opened, reused, bytes, latency."""
+        with self._lock:
+            return {host: dict(values) for host, values in self._metrics.items()}
+
+    def format_metrics(self) -> str:
+        lines = []
+        for host, m in sorted(self.metrics().items()):
+            avg = m["latency_s"] / m["requests"] if m["requests"] else 0.0
+            lines.append(
+                f"  {host}: {m['requests']} requests, {m['connections']} connections "
+                f"({m['reused']} reused), {m['retries']} retries, {m['errors']} errors, "
+                f"{m['bytes'] / 1024:.0f} KB, avg {avg:.2f}s"
+            )
+        return "\n".join(lines)
+
+    def close(self):
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+        for conn in idle:
+            conn.close()
+
+
+_default: HttpClient | None = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    """The process-wide client, so every caller shares one connection pool."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HttpClient()
+        return _default
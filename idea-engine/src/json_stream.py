@@ -0,0 +1,71 @@
+"""
+Incremental JSON parsing for streamed LLM output.
+
+The analyzer asks for a JSON array of per-post analyses. Rather than waiting
+for the whole response, IncrementalJSONParser tracks nesting as text arrives
+and hands back each element of the outermost array (or each value of the
+outermost object) the moment its closing brace is seen. Objects completed
+before a stream is cut off are therefore never lost.
+"""
+
+import json
+
+
+class IncrementalJSONParser:
+    """Pulls complete child objects out of a growing JSON text."""
+
+    def __init__(self):
+        self.text = ""
+        self.emitted = 0
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start: int | None = None
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Add streamed text; return the child objects completed by it.
+
+        Anything before the first '[' or '{' (prose, code fences) is skipped.
+        """
+        self.text += chunk
+        text = self.text
+        completed = []
+
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if not self._started:
+                if c in "[{":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                continue
+            if self._depth == 0:
+                continue
+
+            if c == '"':
+                self._in_string = True
+            elif c in "[{":
+                if self._depth == 1 and c == "{":
+                    self._start = i
+                self._depth += 1
+            elif c in "]}":
+                self._depth -= 1
+                if self._depth == 1 and c == "}" and self._start is not None:
+                    try:
+                        completed.append(json.loads(text[self._start : i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._start = None
+
+        self._pos = len(text)
+        self.emitted += len(completed)
+        return completed
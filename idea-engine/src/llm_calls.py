@@ -0,0 +1,87 @@
+# Generated from engine-shared/llm_calls.py by engine-shared/sync.py. Edit that file, not this copy.
+"""
+Retry policy and token totals for Anthropic API calls.
+
+The analyzers build their clients with max_retries=0 and retry in their own
+loop, so each attempt shows up in the usage ledger (call.retries) and the
+backoff is shared by every worker: backoff() sleeps before the next attempt,
+or re-raises errors that aren't worth retrying. TokenTotals keeps a
+thread-safe running sum of the token counts of an analyzer's responses.
+
+system_blocks() marks a system prompt for prompt caching only when it is
+long enough to be cached: the API ignores cache_control on prefixes below
+the model's minimum (1024 tokens, 2048 on Haiku), and the engines' current
+instructions are all well under that, so they go out unmarked.
+"""
+
+import random
+import threading
+import time
+
+import anthropic
+
+from .prompt_encoding import estimate_tokens
+
+
+# 429 rate limited, 529 overloaded, plus transient 5xx
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504, 529}
+
+# Shortest prefix the API will cache; cache_control on anything shorter is a no-op
+CACHE_MIN_TOKENS = 1024
+HAIKU_CACHE_MIN_TOKENS = 2048
+
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Honor retry-after when the API sends it, else exponential backoff with jitter."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            return min(60.0, float(response.headers.get("retry-after", "")))
+        except ValueError:
+            pass
+    return min(60.0, 2 ** attempt) + random.uniform(0, 1)
+
+
+def backoff(error: Exception, attempt: int, max_retries: int):
+    """Sleep before the next attempt, or re-raise if `error` isn't worth retrying."""
+    if isinstance(error, anthropic.APIStatusError):
+        if error.status_code not in RETRYABLE_STATUS:
+            raise error
+        reason = f"HTTP {error.status_code}"
+    elif isinstance(error, anthropic.APIConnectionError):
+        reason = type(error).__name__
+    else:
+        raise error
+    if attempt >= max_retries:
+        raise error
+
+    delay = retry_delay(error, attempt)
+    print(f"  {reason} from API, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+    time.sleep(delay)
+
+
+def system_blocks(model: str, system: str) -> list[dict]:
+    """`system` as a content block, with cache_control if the API can cache it."""
+    block = {"type": "text", "text": system}
+    minimum = HAIKU_CACHE_MIN_TOKENS if "haiku" in model else CACHE_MIN_TOKENS
+    if estimate_tokens(system) >= minimum:
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
+
+
+class TokenTotals(dict):
+    """Token counts summed over responses, including prompt-cache reads and writes."""
+
+    def __init__(self):
+        super().__init__(dict.fromkeys(TOKEN_FIELDS, 0))
+        self._lock = threading.Lock()
+
+    def add(self, usage):
+        """Add one response's `usage` (None is ignored)."""
+        if usage is None:
+            return
+        with self._lock:
+            for name in TOKEN_FIELDS:
+                self[name] += getattr(usage, name, None) or 0
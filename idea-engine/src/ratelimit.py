@@ -0,0 +1,37 @@
+# Generated from engine-shared/ratelimit.py by engine-shared/sync.py. Edit that file, not this copy.
+"""
+Thread-safe token-bucket rate limiter.
+Keeps concurrent workers (HN scraping, CJ API calls) under a source's request rate.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Allow `rate` requests per second on average, with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then consume them."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
@@ -9,10 +9,15 @@ Sources:
 
 import json
 import time
-import urllib.request
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable, Iterator
+
+from .corpus import open_corpus
+from .http_client import HttpClient, default_client
+from .ratelimit import TokenBucket
 
 PAIN_KEYWORDS = [
     "I wish there was an app",
@@ -32,15 +37,68 @@ PAIN_KEYWORDS = [
 ]
 
 
+def cursor_key(tag: str, keyword: str) -> str:
+    """Key for a per-query high-water mark in the HN cursor file."""
+    return f"{tag}:{keyword.lower()}"
+
+
 class HackerNewsScraper:
     """Scrape Hacker News via their free, no-auth API."""
 
     BASE_URL = "https://hn.algolia.com/api/v1"
+    WINDOWS = {"day": 86400, "week": 7 * 86400, "month": 30 * 86400, "year": 365 * 86400}
+    # Pages read per incremental query before giving up on reaching the cursor
+    MAX_PAGES = 10
+
+    def __init__(self, concurrency: int = 8, requests_per_second: float = 4.0, http: HttpClient | None = None):
+        self.concurrency = max(1, concurrency)
+        self.limiter = TokenBucket(requests_per_second)
+        self.http = http or default_client()
 
     def _get_json(self, url: str) -> dict:
-        req = urllib.request.Request(url, headers={"User-Agent": "idea-engine/1.0"})
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            return json.loads(resp.read().decode())
+        self.limiter.acquire()
+        return self.http.get_json(url, headers={"User-Agent": "idea-engine/1.0"})
+
+    def _query(self, url: str, paged: bool) -> tuple[list[dict], Exception | None, bool]:
+        """Hits for one search URL, its error, and whether every match was fetched.
+
+        With `paged`, follows the result pages (up to MAX_PAGES); otherwise
+        only the first page is read.
+        """
+        hits = []
+        page = 0
+        try:
+            while True:
+                data = self._get_json(f"{url}&page={page}")
+                hits.extend(data.get("hits", []))
+                page += 1
+                if page >= (data.get("nbPages") or 0):
+                    return hits, None, True
+                if not paged or page >= self.MAX_PAGES:
+                    return hits, None, False
+        except Exception as e:
+            return hits, e, False
+
+    def _query_all(self, queries: list[tuple[str, bool]]) -> Iterator[tuple[list[dict], Exception | None, bool]]:
+        """Run queries on a bounded thread pool.
+
+        Results are yielded in input order, each as soon as it and every
+        earlier one have arrived.
+        """
+        if self.concurrency == 1 or len(queries) <= 1:
+            for url, paged in queries:
+                yield self._query(url, paged)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(queries))) as pool:
+            yield from pool.map(lambda query: self._query(*query), queries)
+
+    def _search_url(self, endpoint: str, keyword: str, tags: str, hits_per_page: int, numeric_filter: str) -> str:
+        return (
+            f"{self.BASE_URL}/{endpoint}?query={urllib.parse.quote(keyword)}"
+            f"&tags={tags}"
+            f"&hitsPerPage={hits_per_page}"
+            f"&numericFilters={numeric_filter}"
+        )
 
     def search(
         self,
@@ -48,96 +106,119 @@ class HackerNewsScraper:
         tags: str = "story",
         time_range: str = "month",
         hits_per_page: int = 30,
+        cursors: dict[str, int] | None = None,
+        on_posts: Callable[[list[dict]], None] | None = None,
     ) -> list[dict]:
-        """Search HN stories/comments for pain-point keywords."""
+        """Search HN stories/comments for pain-point keywords within `time_range`.
+
+        Story and comment queries are issued concurrently (up to
+        `self.concurrency` in flight, paced by `self.limiter`), then merged in
+        query order so deduplication and output are deterministic.
+
+        Without `cursors`, each query reads one page of the most relevant hits.
+        With `cursors` (mapping "tag:keyword" to the newest created_at_i
+        already seen), each query uses search_by_date, which lists hits newest
+        first, and pages down to the cursor (or the start of the window), so
+        the cursor is advanced in place to the newest hit. A query cut off at
+        MAX_PAGES says so; the older hits it skipped aren't fetched later.
+
+        `on_posts` is called with each query's new posts as soon as they are
+        parsed, so a consumer can start on them before the search finishes.
+        """
         keywords = keywords or PAIN_KEYWORDS
         results = []
         seen_ids = set()
 
-        time_map = {
-            "day": "last_24h",
-            "week": "past_week",
-            "month": "past_month",
-            "year": "past_year",
-        }
-        numeric_filter = f"created_at_i>{int(time.time()) - 86400 * 30}"
-
-        for keyword in keywords:
-            query = urllib.parse.quote(keyword)
-            url = (
-                f"{self.BASE_URL}/search?query={query}"
-                f"&tags={tags}"
-                f"&hitsPerPage={hits_per_page}"
-                f"&numericFilters={numeric_filter}"
-            )
-
-            try:
-                data = self._get_json(url)
-                for hit in data.get("hits", []):
-                    obj_id = hit.get("objectID", "")
-                    if obj_id in seen_ids:
-                        continue
-                    seen_ids.add(obj_id)
-
-                    results.append({
-                        "id": obj_id,
-                        "source": "hackernews",
-                        "title": hit.get("title", ""),
-                        "body": hit.get("story_text") or hit.get("comment_text") or "",
-                        "url": hit.get("url") or f"https://news.ycombinator.com/item?id={obj_id}",
-                        "score": hit.get("points", 0) or 0,
-                        "num_comments": hit.get("num_comments", 0) or 0,
-                        "created_utc": hit.get("created_at", ""),
-                        "keyword_matched": keyword,
-                        "author": hit.get("author", ""),
-                    })
-            except Exception as e:
-                print(f"  Warning: HN search for '{keyword}' failed: {e}")
-
-            time.sleep(0.3)
-
-        # Also search comments for pain points
-        for keyword in keywords[:8]:
-            query = urllib.parse.quote(keyword)
-            url = (
-                f"{self.BASE_URL}/search?query={query}"
-                f"&tags=comment"
-                f"&hitsPerPage=20"
-                f"&numericFilters={numeric_filter}"
-            )
-
-            try:
-                data = self._get_json(url)
-                for hit in data.get("hits", []):
-                    obj_id = hit.get("objectID", "")
-                    if obj_id in seen_ids:
-                        continue
-                    seen_ids.add(obj_id)
-
+        if time_range not in self.WINDOWS:
+            raise ValueError(f"time_range must be one of {', '.join(self.WINDOWS)}, got {time_range!r}")
+        window_start = int(time.time()) - self.WINDOWS[time_range]
+        incremental = cursors is not None
+
+        def numeric_filter(tag: str, keyword: str) -> str:
+            since = window_start
+            if incremental:
+                since = max(since, cursors.get(cursor_key(tag, keyword), 0))
+            return f"created_at_i>{since}"
+
+        # Stories for every keyword, plus comments for the first 8
+        queries = [("story", keyword, tags, hits_per_page) for keyword in keywords]
+        queries += [("comment", keyword, "comment", 20) for keyword in keywords[:8]]
+
+        endpoint = "search_by_date" if incremental else "search"
+        responses = self._query_all([
+            (self._search_url(endpoint, keyword, tag, hits, numeric_filter(tag, keyword)), incremental)
+            for _, keyword, tag, hits in queries
+        ])
+
+        for (kind, keyword, tag, _), (hits, error, complete) in zip(queries, responses):
+            label = "HN search" if kind == "story" else "HN comment search"
+            if error is not None:
+                print(f"  Warning: {label} for '{keyword}' failed: {error}")
+                continue
+            if incremental and not complete:
+                print(f"  Warning: {label} for '{keyword}' stopped after {self.MAX_PAGES} pages; "
+                      f"older matches skipped")
+
+            if incremental and hits:
+                key = cursor_key(tag, keyword)
+                newest = max(hit.get("created_at_i") or 0 for hit in hits)
+                cursors[key] = max(cursors.get(key, 0), newest)
+
+            found = []
+            for hit in hits:
+                obj_id = hit.get("objectID", "")
+                if obj_id in seen_ids:
+                    continue
+                seen_ids.add(obj_id)
+
+                if kind == "story":
+                    found.append(self._story_post(hit, keyword))
+                else:
                     comment_text = hit.get("comment_text", "")
                     if len(comment_text) < 50:
                         continue
-
-                    results.append({
-                        "id": obj_id,
-                        "source": "hackernews_comment",
-                        "title": f"Comment on: {hit.get('story_title', 'Unknown')}",
-                        "body": comment_text[:2000],
-                        "url": f"https://news.ycombinator.com/item?id={obj_id}",
-                        "score": hit.get("points", 0) or 0,
-                        "num_comments": 0,
-                        "created_utc": hit.get("created_at", ""),
-                        "keyword_matched": keyword,
-                        "author": hit.get("author", ""),
-                    })
-            except Exception as e:
-                print(f"  Warning: HN comment search for '{keyword}' failed: {e}")
-
-            time.sleep(0.3)
+                    found.append(self._comment_post(hit, keyword))
+            results.extend(found)
+            if on_posts and found:
+                on_posts(found)
 
         results.sort(key=lambda x: x["score"], reverse=True)
         return results
 
+    @staticmethod
+    def _story_post(hit: dict, keyword: str) -> dict:
+        obj_id = hit.get("objectID", "")
+        return {
+            "id": obj_id,
+            "source": "hackernews",
+            "title": hit.get("title", ""),
+            "body": hit.get("story_text") or hit.get("comment_text") or "",
+            "url": hit.get("url") or f"https://news.ycombinator.com/item?id={obj_id}",
+            "score": hit.get("points", 0) or 0,
+            "num_comments": hit.get("num_comments", 0) or 0,
+            "created_utc": hit.get("created_at", ""),
+            "created_at_i": hit.get("created_at_i") or 0,
+            "keyword_matched": keyword,
+            "author": hit.get("author", ""),
+        }
+
+    @staticmethod
+    def _comment_post(hit: dict, keyword: str) -> dict:
+        obj_id = hit.get("objectID", "")
+        return {
+            "id": obj_id,
+            "source": "hackernews_comment",
+            "title": f"Comment on: {hit.get('story_title', 'Unknown')}",
+            "body": hit.get("comment_text", "")[:2000],
+            "url": f"https://news.ycombinator.com/item?id={obj_id}",
+            "score": hit.get("points", 0) or 0,
+            "num_comments": 0,
+            "created_utc": hit.get("created_at", ""),
+            "created_at_i": hit.get("created_at_i") or 0,
+            "keyword_matched": keyword,
+            "author": hit.get("author", ""),
+        }
+
 
 class GoogleRedditScraper:
     """
@@ -148,7 +229,15 @@ class GoogleRedditScraper:
     to avoid Google rate limits. For light use, direct requests work.
     """
 
-    def search(self, keywords: list[str] | None = None, limit: int = 20) -> list[dict]:
+    def __init__(self, http: HttpClient | None = None):
+        self.http = http or default_client()
+
+    def search(
+        self,
+        keywords: list[str] | None = None,
+        limit: int = 20,
+        on_posts: Callable[[list[dict]], None] | None = None,
+    ) -> list[dict]:
         keywords = keywords or PAIN_KEYWORDS[:8]
         results = []
         seen_urls = set()
@@ -158,15 +247,14 @@ class GoogleRedditScraper:
             url = f"https://www.google.com/search?q={query}&num={limit}"
 
             try:
-                req = urllib.request.Request(url, headers={
+                html = self.http.get(url, headers={
                     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                })
-                with urllib.request.urlopen(req, timeout=10) as resp:
-                    html = resp.read().decode("utf-8", errors="replace")
+                }, timeout=10).text(errors="replace")
 
                 # Extract Reddit URLs from search results (basic parsing)
                 import re
                 reddit_urls = re.findall(r'https?://(?:www\.)?reddit\.com/r/\w+/comments/\w+/[^"&\s]+', html)
+                found = []
 
                 for reddit_url in reddit_urls:
                     clean_url = reddit_url.split("&")[0].split('"')[0]
@@ -184,7 +272,7 @@ class GoogleRedditScraper:
                         if p == "comments" and i + 2 < len(parts):
                             title_slug = parts[i + 2] if i + 2 < len(parts) else ""
 
-                    results.append({
+                    found.append({
                         "id": title_slug or clean_url,
                         "source": "reddit_via_google",
                         "subreddit": subreddit,
@@ -197,6 +285,10 @@ class GoogleRedditScraper:
                         "keyword_matched": keyword,
                     })
 
+                results.extend(found)
+                if on_posts and found:
+                    on_posts(found)
+
             except Exception as e:
                 print(f"  Warning: Google search for '{keyword}' failed: {e}")
 
@@ -208,26 +300,55 @@ class GoogleRedditScraper:
 class MultiScraper:
     """Aggregates results from all scrapers."""
 
-    def __init__(self):
-        self.hn = HackerNewsScraper()
+    def __init__(self, hn_concurrency: int = 8, data_dir: str | Path = "data"):
+        self.hn = HackerNewsScraper(concurrency=hn_concurrency)
         self.google = GoogleRedditScraper()
+        self.data_dir = Path(data_dir)
+        self.cursor_file = self.data_dir / "hn_cursors.json"
+        self.cursors: dict[str, int] | None = None
+
+    def _load_cursors(self) -> dict[str, int]:
+        if self.cursor_file.exists():
+            try:
+                return json.loads(self.cursor_file.read_text(encoding="utf-8")).get("cursors", {})
+            except (json.JSONDecodeError, AttributeError):
+                pass
+        return {}
+
+    def _save_cursors(self):
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.cursor_file.write_text(json.dumps({
+            "updated_at": datetime.now(tz=timezone.utc).isoformat(),
+            "cursors": self.cursors,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
 
     def scrape_all(
         self,
         keywords: list[str] | None = None,
         include_google: bool = True,
         time_range: str = "month",
+        incremental: bool = True,
+        on_posts: Callable[[list[dict]], None] | None = None,
     ) -> list[dict]:
+        """Scrape every source. When `incremental`, HN only returns items newer
+        than the per-query cursors in data/hn_cursors.json; the advanced cursors
+        are written by save_raw once the posts are in the corpus.
+
+        `on_posts` receives posts as each query completes (see
+        HackerNewsScraper.search)."""
         all_results = []
+        self.cursors = self._load_cursors() if incremental else {}
 
         print("=== Scanning Hacker News ===")
-        hn_results = self.hn.search(keywords, time_range=time_range)
+        if incremental and self.cursors:
+            print(f"  Incremental mode: {len(self.cursors)} cursors loaded")
+        hn_results = self.hn.search(keywords, time_range=time_range, cursors=self.cursors, on_posts=on_posts)
         print(f"  Found {len(hn_results)} posts/comments")
         all_results.extend(hn_results)
 
         if include_google:
             print("\n=== Scanning Reddit via Google ===")
-            google_results = self.google.search(keywords)
+            google_results = self.google.search(keywords, on_posts=on_posts)
             print(f"  Found {len(google_results)} Reddit threads")
             all_results.extend(google_results)
 
@@ -235,24 +356,12 @@ class MultiScraper:
         return all_results
 
     def save_raw(self, results: list[dict], output_dir: str | Path = "data") -> Path:
-        output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filepath = output_dir / f"raw_scrape_{timestamp}.json"
-
-        sources = {}
-        for r in results:
-            s = r.get("source", "unknown")
-            sources[s] = sources.get(s, 0) + 1
-
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump({
-                "scraped_at": datetime.now(tz=timezone.utc).isoformat(),
-                "total_posts": len(results),
-                "sources": sources,
-                "posts": results,
-            }, f, indent=2, ensure_ascii=False)
-
-        print(f"\nSaved {len(results)} posts to {filepath}")
-        return filepath
+        """Append new or changed posts to the scrape corpus and return its directory."""
+        corpus = open_corpus(output_dir)
+        written = corpus.append(results)
+
+        if self.cursors is not None:
+            self._save_cursors()
+
+        print(f"\nSaved {written} new/changed posts to {corpus.root} ({len(corpus)} unique total)")
+        return corpus.root
@@ -0,0 +1,59 @@
+"""
+Embedding-free near-duplicate detection for ideas.
+
+Each idea is reduced to a set of shingles (word bigrams of its name, problem
+and description) and a MinHash signature over them. Names that differ only in
+spacing or punctuation are matched directly via normalize_name().
+Signatures are split into LSH bands, so candidate duplicates are found by a
+few indexed bucket lookups instead of comparing against every stored idea.
+"""
+
+import hashlib
+import random
+import re
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x1DEA)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize_name(name: str) -> str:
+    """'Focus Flow', 'focus-flow' and 'FocusFlow' all become 'focusflow'."""
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def shingles(idea: dict) -> set[str]:
+    """Word bigrams of name, problem and description (single words if fewer than two)."""
+    text = f"{idea.get('name', '')} {idea.get('problem', '')} {idea.get('description', '')}".lower()
+    words = re.findall(r"[a-z0-9]+", text)
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash(idea: dict) -> list[int] | None:
+    """MinHash signature of an idea, or None if it has no text to compare."""
+    grams = shingles(idea)
+    if not grams:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big") for g in grams]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+def similarity(sig_a: list[int], sig_b: list[int]) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def lsh_buckets(signature: list[int]) -> list[tuple[int, str]]:
+    """(band, bucket) pairs; ideas sharing any pair are duplicate candidates."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS : (band + 1) * ROWS]
+        digest = hashlib.blake2b(",".join(map(str, rows)).encode(), digest_size=8).hexdigest()
+        buckets.append((band, digest))
+    return buckets
@@ -1,87 +1,410 @@
 """
-Simple JSON-file storage for ideas and scrape history.
-Keeps everything human-readable and git-friendly.
+SQLite-backed storage for ideas.
+
+Ideas live in data/ideas.db (stdlib sqlite3) with indexes on the lowercased
+name, status and confidence, so lookups and status updates touch single rows
+instead of rewriting one big JSON file. The full idea dict is kept as a JSON
+column, so callers see the same dicts as before. An existing data/ideas.json
+is imported once on first open.
+
+Near-duplicates ("FocusFlow" vs "Focus Flow", or ideas with nearly identical
+descriptions) are caught on insert with a MinHash/LSH index kept in the same
+database (see similarity.py) and merged into the existing idea as aliases.
+
+Mutations commit individually unless wrapped in `with store.batch():`, which
+coalesces them into a single transaction. export_json() writes a readable
+snapshot back to ideas.json through a temp file and os.replace.
 """
 
 import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
+from .corpus import content_hash, post_key
+from .similarity import lsh_buckets, minhash, normalize_name, similarity
+
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ideas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name_key TEXT NOT NULL,
+    status TEXT,
+    confidence REAL,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ideas_name_key ON ideas(name_key);
+CREATE INDEX IF NOT EXISTS idx_ideas_status ON ideas(status);
+CREATE INDEX IF NOT EXISTS idx_ideas_confidence ON ideas(confidence);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS analyzed_posts (
+    post_key TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    idea_count INTEGER NOT NULL,
+    analyzed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idea_minhash (
+    idea_id INTEGER PRIMARY KEY,
+    name_norm TEXT NOT NULL,
+    signature TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_idea_minhash_name ON idea_minhash(name_norm);
+CREATE TABLE IF NOT EXISTS idea_lsh (
+    band INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    idea_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_idea_lsh_bucket ON idea_lsh(band, bucket);
+CREATE INDEX IF NOT EXISTS idx_idea_lsh_idea ON idea_lsh(idea_id);
+"""
+
+DUPLICATE_THRESHOLD = 0.6
+
+
+def _confidence(value) -> float | None:
+    try:
+        return float(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
 
 class IdeaStore:
-    def __init__(self, data_dir: Path | str | None = None):
+    def __init__(
+        self,
+        data_dir: Path | str | None = None,
+        duplicate_threshold: float | None = DUPLICATE_THRESHOLD,
+    ):
+        """duplicate_threshold: estimated Jaccard similarity at which a new idea
+        is merged into an existing one; None keeps exact-name dedup only."""
         self.data_dir = Path(data_dir) if data_dir else DATA_DIR
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.ideas_file = self.data_dir / "ideas.json"
-        self.ideas = self._load()
+        self.db_file = self.data_dir / "ideas.db"
+
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.duplicate_threshold = duplicate_threshold
+        self._migrate_json()
+        self._index_missing()
+
+    def _migrate_json(self):
+        """Import the legacy ideas.json once; later opens skip it."""
+        done = self.conn.execute("SELECT value FROM meta WHERE key = 'json_migrated'").fetchone()
+        if done or not self.ideas_file.exists():
+            return
+
+        with open(self.ideas_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        legacy = data.get("ideas", []) if isinstance(data, dict) else data
+
+        with self._transaction():
+            for idea in legacy:
+                name = idea.get("name", "").lower()
+                if name:
+                    self._insert(idea, name)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (datetime.now(tz=timezone.utc).isoformat(),),
+            )
+        print(f"Migrated {len(legacy)} ideas from {self.ideas_file} to {self.db_file}")
+
+    @contextmanager
+    def _transaction(self):
+        """Commit on exit, unless an enclosing batch() or transaction will commit instead."""
+        with self._lock:
+            if self._batch_depth:
+                yield
+                return
+            self._batch_depth += 1
+            try:
+                with self.conn:
+                    yield
+            finally:
+                self._batch_depth -= 1
+
+    @contextmanager
+    def batch(self):
+        """Coalesce every mutation inside the block into one atomic commit.
+
+        Nested batches join the outermost one. If the block raises, all of its
+        changes are rolled back.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self.conn.rollback()
+                raise
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.conn.commit()
 
-    def _load(self) -> list[dict]:
-        if self.ideas_file.exists():
-            with open(self.ideas_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("ideas", []) if isinstance(data, dict) else data
-        return []
+    def flush(self):
+        """Commit pending mutations now, including those of an open batch."""
+        with self._lock:
+            self.conn.commit()
 
-    def _save(self):
-        with open(self.ideas_file, "w", encoding="utf-8") as f:
+    def export_json(self, path: Path | str | None = None) -> Path:
+        """Write a human-readable snapshot of all ideas atomically (default: ideas.json)."""
+        path = Path(path) if path else self.ideas_file
+        ideas = self.ideas
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump({
                 "updated_at": datetime.now(tz=timezone.utc).isoformat(),
-                "total": len(self.ideas),
-                "ideas": self.ideas,
+                "total": len(ideas),
+                "ideas": ideas,
             }, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return path
+
+    def _insert(self, idea: dict, name_key: str) -> int | None:
+        """Insert an idea and index it; returns its row id, or None if the name exists."""
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO ideas (name_key, status, confidence, data) VALUES (?, ?, ?, ?)",
+            (name_key, idea.get("status"), _confidence(idea.get("confidence")),
+             json.dumps(idea, ensure_ascii=False)),
+        )
+        if cursor.rowcount != 1:
+            return None
+        self._index(cursor.lastrowid, idea, minhash(idea))
+        return cursor.lastrowid
+
+    def _index(self, idea_id: int, idea: dict, signature: list[int] | None):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO idea_minhash (idea_id, name_norm, signature) VALUES (?, ?, ?)",
+            (idea_id, normalize_name(idea.get("name", "")), json.dumps(signature) if signature else None),
+        )
+        if signature:
+            self.conn.executemany(
+                "INSERT INTO idea_lsh (band, bucket, idea_id) VALUES (?, ?, ?)",
+                [(band, bucket, idea_id) for band, bucket in lsh_buckets(signature)],
+            )
+
+    def _index_missing(self):
+        """Build similarity entries for ideas stored before the index existed."""
+        rows = self.conn.execute(
+            "SELECT id, data FROM ideas WHERE id NOT IN (SELECT idea_id FROM idea_minhash)"
+        ).fetchall()
+        if not rows:
+            return
+        with self._transaction():
+            for idea_id, data in rows:
+                idea = json.loads(data)
+                self._index(idea_id, idea, minhash(idea))
+
+    def _find_duplicate(self, idea: dict, signature: list[int] | None) -> int | None:
+        """Id of a stored idea that `idea` nearly duplicates, via name or LSH buckets."""
+        if self.duplicate_threshold is None:
+            return None
+        name_norm = normalize_name(idea.get("name", ""))
+        if name_norm:
+            row = self.conn.execute(
+                "SELECT idea_id FROM idea_minhash WHERE name_norm = ? ORDER BY idea_id LIMIT 1",
+                (name_norm,),
+            ).fetchone()
+            if row:
+                return row[0]
+        if not signature:
+            return None
+
+        candidates = set()
+        for band, bucket in lsh_buckets(signature):
+            candidates.update(row[0] for row in self.conn.execute(
+                "SELECT idea_id FROM idea_lsh WHERE band = ? AND bucket = ?", (band, bucket)
+            ))
+        best, best_score = None, 0.0
+        for idea_id in sorted(candidates):
+            row = self.conn.execute(
+                "SELECT signature FROM idea_minhash WHERE idea_id = ?", (idea_id,)
+            ).fetchone()
+            if not row or not row[0]:
+                continue
+            score = similarity(signature, json.loads(row[0]))
+            if score >= self.duplicate_threshold and score > best_score:
+                best, best_score = idea_id, score
+        return best
+
+    def _merge(self, idea_id: int, duplicate: dict):
+        """Fold a near-duplicate into a stored idea, keeping the higher confidence."""
+        row = self.conn.execute("SELECT data FROM ideas WHERE id = ?", (idea_id,)).fetchone()
+        idea = json.loads(row[0])
+        aliases = idea.setdefault("aliases", [])
+        name = duplicate.get("name", "")
+        if name and name != idea.get("name") and name not in aliases:
+            aliases.append(name)
+        for alias in duplicate.get("aliases", []):
+            if alias != idea.get("name") and alias not in aliases:
+                aliases.append(alias)
+        if (_confidence(duplicate.get("confidence")) or 0) > (_confidence(idea.get("confidence")) or 0):
+            idea["confidence"] = duplicate["confidence"]
+        source = duplicate.get("source_post_id")
+        if source and source != idea.get("source_post_id"):
+            sources = idea.setdefault("merged_sources", [])
+            if source not in sources:
+                sources.append(source)
+        self.conn.execute(
+            "UPDATE ideas SET confidence = ?, data = ? WHERE id = ?",
+            (_confidence(idea.get("confidence")), json.dumps(idea, ensure_ascii=False), idea_id),
+        )
+
+    def _query(self, sql: str, params: tuple = ()) -> list[dict]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    @property
+    def ideas(self) -> list[dict]:
+        """All ideas in insertion order."""
+        return self._query("SELECT data FROM ideas ORDER BY id")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM ideas").fetchone()[0]
 
     def add_ideas(self, new_ideas: list[dict]) -> int:
-        """Add new ideas, deduplicating by name."""
-        existing_names = {idea.get("name", "").lower() for idea in self.ideas}
+        """Add new ideas, deduplicating by name and merging near-duplicates."""
         added = 0
 
-        for idea in new_ideas:
-            name = idea.get("name", "").lower()
-            if name and name not in existing_names:
+        with self._transaction():
+            for idea in new_ideas:
+                name = idea.get("name", "").lower()
+                if not name:
+                    continue
+                exists = self.conn.execute("SELECT 1 FROM ideas WHERE name_key = ?", (name,)).fetchone()
+                if exists:
+                    continue
+                signature = minhash(idea)
+                duplicate_of = self._find_duplicate(idea, signature)
+                if duplicate_of is not None:
+                    self._merge(duplicate_of, idea)
+                    continue
                 idea["added_at"] = datetime.now(tz=timezone.utc).isoformat()
                 idea["status"] = "new"
-                self.ideas.append(idea)
-                existing_names.add(name)
-                added += 1
+                if self._insert(idea, name):
+                    added += 1
 
-        self._save()
         return added
 
+    def consolidate(self) -> int:
+        """Merge near-duplicates already in the store into their earliest copy.
+
+        Run before ranking so the ranking prompt sees each idea once. Returns
+        the number of ideas merged away.
+        """
+        if self.duplicate_threshold is None:
+            return 0
+        merged = 0
+        with self._transaction():
+            rows = self.conn.execute(
+                "SELECT i.id, i.data, m.signature FROM ideas i "
+                "LEFT JOIN idea_minhash m ON m.idea_id = i.id ORDER BY i.id"
+            ).fetchall()
+            # Rebuild the index in id order so each idea is only compared with earlier ones
+            self.conn.execute("DELETE FROM idea_minhash")
+            self.conn.execute("DELETE FROM idea_lsh")
+            for idea_id, data, signature in rows:
+                idea = json.loads(data)
+                signature = json.loads(signature) if signature else minhash(idea)
+                duplicate_of = self._find_duplicate(idea, signature)
+                if duplicate_of is None:
+                    self._index(idea_id, idea, signature)
+                    continue
+                self._merge(duplicate_of, idea)
+                self.conn.execute("DELETE FROM ideas WHERE id = ?", (idea_id,))
+                merged += 1
+        return merged
+
     def update_status(self, idea_name: str, status: str, notes: str = ""):
-        """Update an idea's status: new -> investigating -> validating -> building -> rejected."""
-        for idea in self.ideas:
-            if idea.get("name", "").lower() == idea_name.lower():
-                idea["status"] = status
-                if notes:
-                    idea.setdefault("notes", []).append({
-                        "timestamp": datetime.now(tz=timezone.utc).isoformat(),
-                        "note": notes,
-                    })
-                self._save()
-                return True
-        return False
+        """Update an idea's status: new -> investigating -> validating -> building -> built / build_failed / rejected."""
+        with self._transaction():
+            row = self.conn.execute(
+                "SELECT id, data FROM ideas WHERE name_key = ?", (idea_name.lower(),)
+            ).fetchone()
+            if not row:
+                return False
+
+            idea = json.loads(row[1])
+            idea["status"] = status
+            if notes:
+                idea.setdefault("notes", []).append({
+                    "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+                    "note": notes,
+                })
+            self.conn.execute(
+                "UPDATE ideas SET status = ?, data = ? WHERE id = ?",
+                (status, json.dumps(idea, ensure_ascii=False), row[0]),
+            )
+        return True
+
+    def get(self, idea_name: str) -> dict | None:
+        found = self._query("SELECT data FROM ideas WHERE name_key = ?", (idea_name.lower(),))
+        return found[0] if found else None
 
     def get_by_status(self, status: str) -> list[dict]:
-        return [i for i in self.ideas if i.get("status") == status]
+        return self._query("SELECT data FROM ideas WHERE status = ? ORDER BY id", (status,))
 
     def get_top(self, n: int = 10) -> list[dict]:
         """Return top N ideas by confidence score."""
-        scored = [i for i in self.ideas if i.get("confidence")]
-        scored.sort(key=lambda x: x["confidence"], reverse=True)
-        return scored[:n]
+        return self._query(
+            "SELECT data FROM ideas WHERE confidence IS NOT NULL "
+            "ORDER BY confidence DESC, id LIMIT ?",
+            (n,),
+        )
+
+    def pending_posts(self, posts: list[dict]) -> list[dict]:
+        """Posts that were never analyzed, or whose title/body changed since."""
+        keys = [post_key(p) for p in posts]
+        seen = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                seen.update(self.conn.execute(
+                    f"SELECT post_key, content_hash FROM analyzed_posts "
+                    f"WHERE post_key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall())
+        return [p for p in posts if seen.get(post_key(p)) != content_hash(p)]
+
+    def record_analysis(self, posts: list[dict], ideas: list[dict]) -> int:
+        """Store a batch's ideas and mark its posts analyzed in one transaction."""
+        now = datetime.now(tz=timezone.utc).isoformat()
+        with self._transaction():
+            added = self.add_ideas(ideas)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO analyzed_posts (post_key, content_hash, idea_count, analyzed_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(post_key(p), content_hash(p), len(ideas), now) for p in posts],
+            )
+        return added
 
     def summary(self) -> dict:
         """Quick summary of stored ideas."""
-        statuses = {}
-        for idea in self.ideas:
-            s = idea.get("status", "unknown")
-            statuses[s] = statuses.get(s, 0) + 1
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT COALESCE(status, 'unknown'), COUNT(*) FROM ideas GROUP BY 1 ORDER BY MIN(id)"
+            ).fetchall()
+        statuses = dict(rows)
 
         return {
-            "total": len(self.ideas),
+            "total": sum(statuses.values()),
             "by_status": statuses,
             "top_3": [
                 {"name": i.get("name"), "confidence": i.get("confidence")}
@@ -0,0 +1,203 @@
+"""
+Overlapped scrape → analyze → store execution for the pipeline.
+
+Instead of waiting for every query to finish before analysis starts, the
+stages run concurrently and hand work on through bounded queues:
+
+  scraper thread ──posts──▶ batcher ──batches──▶ analysis workers ──ideas──▶ store
+
+Posts are packed into analysis requests as they arrive (BatchPacker), and
+each batch's ideas are recorded in the IdeaStore as soon as that batch
+completes. The bounded queues apply backpressure, so a slow stage throttles
+the ones before it instead of piling up work in memory. Total latency
+approaches that of the slowest stage rather than the sum of all of them.
+
+With max_posts, the batcher keeps the best max_posts new posts by score
+seen so far and only sends them once scraping ends: which posts make the
+cut isn't known before every query has answered, so a capped run overlaps
+the analysis batches with each other but not with scraping. If any stage
+fails, the others stop instead of blocking on a full queue.
+"""
+
+import heapq
+import queue
+import threading
+
+from .analyzer import BatchPacker, IdeaAnalyzer
+from .corpus import post_key
+from .reddit_scraper import MultiScraper
+from .storage import IdeaStore
+
+_DONE = object()
+
+
+class StreamingPipeline:
+    def __init__(
+        self,
+        scraper: MultiScraper,
+        analyzer: IdeaAnalyzer,
+        store: IdeaStore,
+        max_posts: int | None = None,
+        batch_size: int | None = None,
+        queue_size: int = 256,
+    ):
+        """max_posts caps how many new posts are sent for analysis (the
+        highest-scoring ones); every scraped post is still saved to the corpus."""
+        self.scraper = scraper
+        self.analyzer = analyzer
+        self.store = store
+        self.max_posts = max_posts
+        self.batch_size = batch_size
+        self.workers = analyzer.max_concurrency
+
+        self.posts: queue.Queue = queue.Queue(maxsize=queue_size)
+        # At most one batch waiting per worker; the batcher blocks beyond that
+        self.batches: queue.Queue = queue.Queue(maxsize=self.workers)
+        self.results: queue.Queue = queue.Queue(maxsize=self.workers * 2)
+
+        self.scraped: list[dict] = []
+        # Posts sent for analysis, in the order they were queued
+        self.streamed: list[dict] = []
+        self.queued = 0
+        self._errors: list[BaseException] = []
+        self._stop = threading.Event()
+
+    def _fail(self, error: BaseException):
+        self._errors.append(error)
+        self._stop.set()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Put unless another stage has failed; False if the item was dropped."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        """Next item, or _DONE once another stage has failed."""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _produce(self, scrape_kwargs: dict):
+        def on_posts(posts: list[dict]):
+            for post in posts:
+                if not self._put(self.posts, post):
+                    return
+
+        try:
+            self.scraped = self.scraper.scrape_all(on_posts=on_posts, **scrape_kwargs)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(self.posts, _DONE)
+
+    def _send(self, packer: BatchPacker, post: dict):
+        self.queued += 1
+        self.streamed.append(post)
+        batch = packer.add(post)
+        if batch:
+            self._put(self.batches, (self.queued - len(batch) - 1, batch))
+
+    def _batch(self):
+        packer = BatchPacker(self.analyzer, self.batch_size)
+        seen = set()
+        # With max_posts: min-heap of the best (score, arrival, post) so far
+        best = []
+        try:
+            while True:
+                post = self._get(self.posts)
+                if post is _DONE:
+                    break
+                key = post_key(post)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if not self.store.pending_posts([post]):
+                    continue
+                if not self.max_posts:
+                    self._send(packer, post)
+                    continue
+                entry = (post.get("score", 0) or 0, -len(seen), post)
+                if len(best) < self.max_posts:
+                    heapq.heappush(best, entry)
+                elif entry[:2] > best[0][:2]:
+                    heapq.heapreplace(best, entry)
+            for _, _, post in sorted(best, key=lambda e: e[:2], reverse=True):
+                self._send(packer, post)
+            batch = packer.flush()
+            if batch:
+                self._put(self.batches, (self.queued - len(batch), batch))
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for _ in range(self.workers):
+                self._put(self.batches, _DONE)
+
+    def _analyze(self):
+        try:
+            while True:
+                item = self._get(self.batches)
+                if item is _DONE:
+                    break
+                start, batch = item
+                if not self._put(self.results, self.analyzer._analyze_batch(batch, start, 0)):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # run() drains results until every worker reports, so this can't block for long
+            self.results.put(_DONE)
+
+    def run(self, **scrape_kwargs) -> dict:
+        """Scrape, analyze and store concurrently; returns counts for the run.
+
+        Keyword arguments go to MultiScraper.scrape_all. The scraped posts are
+        available as self.scraped afterwards (save them with save_raw), and
+        the ones sent for analysis as self.streamed.
+        """
+        before = len(self.store)
+        threads = [
+            threading.Thread(target=self._produce, args=(scrape_kwargs,), name="scrape", daemon=True),
+            threading.Thread(target=self._batch, name="batch", daemon=True),
+        ]
+        threads += [
+            threading.Thread(target=self._analyze, name=f"analyze-{n}", daemon=True)
+            for n in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Store writes happen here, in order of batch completion
+        ideas = 0
+        finished = 0
+        try:
+            while finished < self.workers:
+                parts = self.results.get()
+                if parts is _DONE:
+                    finished += 1
+                    continue
+                for part, found in parts:
+                    self.store.record_analysis(part, found)
+                    ideas += len(found)
+        except BaseException:
+            self._stop.set()
+            raise
+
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+        return {
+            "posts": len(self.scraped),
+            "analyzed": self.queued,
+            "ideas": ideas,
+            "added": len(self.store) - before,
+        }
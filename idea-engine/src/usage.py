@@ -0,0 +1,159 @@
+# Generated from engine-shared/usage.py by engine-shared/sync.py. Edit that file, not this copy.
+"""
+Token, cost and latency accounting for LLM calls.
+
+Every messages.create / stream call made through track_call() appends one
+line to data/usage.jsonl: model, input/output/prompt-cache tokens, latency,
+retries, the CLI command and pipeline stage that made it, and the run id.
+Responses served from the local response cache are logged too, with zero
+tokens. `python -m src.cli usage` summarizes the ledger per run, per day and
+per stage.
+
+Nothing is written until start_run() has been called, so using the
+analyzers as a library doesn't create files.
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+# USD per million tokens: input, output, cache write, cache read
+PRICES = {
+    "claude-opus-4": (15.0, 75.0, 18.75, 1.50),
+    "claude-sonnet-4": (3.0, 15.0, 3.75, 0.30),
+    "claude-3-7-sonnet": (3.0, 15.0, 3.75, 0.30),
+    "claude-3-5-sonnet": (3.0, 15.0, 3.75, 0.30),
+    "claude-3-5-haiku": (0.80, 4.0, 1.0, 0.08),
+    "claude-haiku-4": (1.0, 5.0, 1.25, 0.10),
+}
+DEFAULT_PRICE = PRICES["claude-sonnet-4"]
+
+# Message Batches requests are billed at half price
+BULK_DISCOUNT = 0.5
+
+TOKEN_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+_lock = threading.Lock()
+_context = {"path": None, "run_id": None, "command": None, "stage": None}
+
+
+def start_run(command: str, path: Path | str = Path("data") / "usage.jsonl") -> str:
+    """Enable the ledger for this process and tag later calls with a new run id."""
+    run_id = f"{datetime.now(tz=timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+    with _lock:
+        _context.update(path=Path(path), run_id=run_id, command=command, stage=command)
+    return run_id
+
+
+def set_stage(stage: str):
+    """Attribute subsequent calls to a pipeline stage (analyze, rank, ...)."""
+    with _lock:
+        _context["stage"] = stage
+
+
+def estimate_cost(model: str, tokens: dict, bulk: bool = False) -> float:
+    price = next((p for prefix, p in PRICES.items() if model.startswith(prefix)), DEFAULT_PRICE)
+    cost = sum(tokens.get(field, 0) * rate for field, rate in zip(TOKEN_FIELDS, price)) / 1_000_000
+    return cost * BULK_DISCOUNT if bulk else cost
+
+
+def record(
+    model: str,
+    usage=None,
+    latency: float = 0.0,
+    retries: int = 0,
+    cached: bool = False,
+    bulk: bool = False,
+    error: str | None = None,
+):
+    """Append one call to the ledger. `usage` is the response's usage object."""
+    with _lock:
+        context = dict(_context)
+    if context["path"] is None:
+        return
+
+    tokens = {field: getattr(usage, field, None) or 0 for field in TOKEN_FIELDS}
+    entry = {
+        "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+        "run_id": context["run_id"],
+        "command": context["command"],
+        "stage": context["stage"],
+        "model": model,
+        **tokens,
+        "cost_usd": round(estimate_cost(model, tokens, bulk), 6),
+        "latency_s": round(latency, 3),
+        "retries": retries,
+        "cached": cached,
+        "bulk": bulk,
+    }
+    if error:
+        entry["error"] = error
+
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    with _lock:
+        context["path"].parent.mkdir(parents=True, exist_ok=True)
+        with open(context["path"], "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class _Call:
+    def __init__(self):
+        self.retries = 0
+        self.usage = None
+
+
+@contextmanager
+def track_call(model: str):
+    """Time one logical LLM call, including its retries.
+
+    Inside the block set `call.retries` per attempt and `call.usage` from
+    the final response; an exception is logged as a failed call and re-raised.
+    """
+    call = _Call()
+    started = time.monotonic()
+    try:
+        yield call
+    except Exception as e:
+        record(model, call.usage, time.monotonic() - started, call.retries, error=type(e).__name__)
+        raise
+    record(model, call.usage, time.monotonic() - started, call.retries)
+
+
+def load(path: Path | str = Path("data") / "usage.jsonl") -> list[dict]:
+    path = Path(path)
+    if not path.exists():
+        return []
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return entries
+
+
+def summarize(entries: list[dict], key) -> list[dict]:
+    """Aggregate entries grouped by key(entry), in order of first appearance."""
+    groups = defaultdict(lambda: {
+        "calls": 0, "cached": 0, "errors": 0, "retries": 0,
+        **{field: 0 for field in TOKEN_FIELDS},
+        "cost_usd": 0.0, "latency_s": 0.0,
+    })
+    for entry in entries:
+        group = groups[key(entry)]
+        group["calls"] += 1
+        group["cached"] += bool(entry.get("cached"))
+        group["errors"] += bool(entry.get("error"))
+        group["retries"] += entry.get("retries", 0)
+        for field in TOKEN_FIELDS:
+            group[field] += entry.get(field, 0)
+        group["cost_usd"] += entry.get("cost_usd", 0.0)
+        group["latency_s"] += entry.get("latency_s", 0.0)
+    return [{"key": k, **v} for k, v in groups.items()]
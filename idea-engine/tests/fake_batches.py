@@ -0,0 +1,64 @@
+"""
+In-memory stand-in for the Message Batches part of anthropic.Anthropic.
+
+FakeBatchesClient().messages.batches offers create / retrieve / results with
+the attributes BulkAnalyzer reads. Each request's outcome comes from
+`respond(custom_id, params)`, which returns the response text for a
+succeeded item, or "errored" / "expired" / "canceled" for a failed one.
+A job reports "in_progress" for `polls` retrieves, then "ended".
+"""
+
+import itertools
+from types import SimpleNamespace
+
+FAILED = ("errored", "expired", "canceled")
+
+
+class _Batches:
+    def __init__(self, respond, polls: int):
+        self.respond = respond
+        self.polls = polls
+        self.jobs: dict[str, dict] = {}
+        self._ids = itertools.count(1)
+
+    def create(self, requests: list[dict]):
+        job_id = f"msgbatch_{next(self._ids):04d}"
+        self.jobs[job_id] = {"requests": requests, "retrieved": 0}
+        return SimpleNamespace(id=job_id, processing_status="in_progress")
+
+    def _outcomes(self, job_id: str) -> list[tuple[str, str]]:
+        return [(req["custom_id"], self.respond(req["custom_id"], req["params"]))
+                for req in self.jobs[job_id]["requests"]]
+
+    def retrieve(self, job_id: str):
+        job = self.jobs[job_id]
+        job["retrieved"] += 1
+        ended = job["retrieved"] > self.polls
+        outcomes = [outcome for _, outcome in self._outcomes(job_id)] if ended else []
+        counts = SimpleNamespace(
+            processing=0 if ended else len(job["requests"]),
+            succeeded=sum(o not in FAILED for o in outcomes),
+            errored=sum(o == "errored" for o in outcomes),
+            expired=sum(o == "expired" for o in outcomes),
+            canceled=sum(o == "canceled" for o in outcomes),
+        )
+        return SimpleNamespace(
+            id=job_id, processing_status="ended" if ended else "in_progress", request_counts=counts,
+        )
+
+    def results(self, job_id: str):
+        for custom_id, outcome in self._outcomes(job_id):
+            if outcome in FAILED:
+                yield SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type=outcome))
+                continue
+            message = SimpleNamespace(
+                content=[SimpleNamespace(type="text", text=outcome)],
+                stop_reason="end_turn",
+                usage=SimpleNamespace(input_tokens=100, output_tokens=50),
+            )
+            yield SimpleNamespace(custom_id=custom_id, result=SimpleNamespace(type="succeeded", message=message))
+
+
+class FakeBatchesClient:
+    def __init__(self, respond, polls: int = 1):
+        self.messages = SimpleNamespace(batches=_Batches(respond, polls))
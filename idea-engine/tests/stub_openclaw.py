@@ -0,0 +1,16 @@
+"""
+Stand-in for OpenClaw's agent CLI: BuildScheduler(command=[sys.executable, this file]).
+
+Prints the build prompt's first line and exits 0, or 1 when the app name
+contains "Broken", or sleeps past any short timeout when it contains "Slow".
+"""
+
+import sys
+import time
+
+prompt = sys.argv[-1]
+first_line = prompt.splitlines()[0]
+print(f"stub build: {first_line}")
+if "Slow" in first_line:
+    time.sleep(30)
+sys.exit(1 if "Broken" in first_line else 0)
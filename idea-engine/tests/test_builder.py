@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+
+from src.build_queue import BuildQueue, BuildWorker
+from src.builder import BuildScheduler
+from src.storage import IdeaStore
+
+STUB = [sys.executable, str(Path(__file__).with_name("stub_openclaw.py"))]
+
+
+def _idea(name: str) -> dict:
+    return {"name": name, "description": f"{name} for busy people", "key_features": ["one tap"],
+            "confidence": 8}
+
+
+def _scheduler(tmp_path, store=None, command=STUB, **kwargs) -> BuildScheduler:
+    return BuildScheduler(log_dir=tmp_path / "build_logs", openclaw_dir=tmp_path, store=store,
+                          command=command, **kwargs)
+
+
+def _status(store: IdeaStore, name: str) -> str:
+    return next(idea for idea in store.ideas if idea["name"] == name)["status"]
+
+
+def test_build_marks_outcome_on_the_idea(tmp_path):
+    store = IdeaStore(tmp_path)
+    store.add_ideas([_idea("Chore Tracker"), _idea("Broken Timer")])
+    scheduler = _scheduler(tmp_path, store)
+
+    ok, failed = scheduler.run([_idea("Chore Tracker"), _idea("Broken Timer")])
+
+    assert ok["success"] and ok["returncode"] == 0
+    assert "stub build" in Path(ok["log"]).read_text(encoding="utf-8")
+    assert not failed["success"] and failed["returncode"] == 1
+    assert _status(store, "Chore Tracker") == "built"
+    assert _status(store, "Broken Timer") == "build_failed"
+
+
+def test_build_that_cannot_start_is_marked_failed(tmp_path):
+    store = IdeaStore(tmp_path)
+    store.add_ideas([_idea("Chore Tracker")])
+    scheduler = _scheduler(tmp_path, store, command=[str(tmp_path / "no-such-runner")])
+
+    result = scheduler.build(_idea("Chore Tracker"))
+
+    assert not result["success"]
+    assert "FileNotFoundError" in result["error"]
+    assert _status(store, "Chore Tracker") == "build_failed"
+
+
+def test_build_timeout_kills_the_runner(tmp_path):
+    result = _scheduler(tmp_path, timeout=0.5).build(_idea("Slow Builder"))
+    assert result["timed_out"] and not result["success"]
+
+
+def test_concurrent_builds_get_separate_logs(tmp_path):
+    prefix = "Habit Tracker For Remote Teams With Shared Goals"
+    ideas = [_idea(f"{prefix} {n}") for n in range(4)]
+    results = _scheduler(tmp_path, max_parallel=4).run(ideas)
+    assert len({r["log"] for r in results}) == 4
+
+
+def test_worker_retries_then_fails_and_skips_duplicates(tmp_path):
+    store = IdeaStore(tmp_path)
+    store.add_ideas([_idea("Chore Tracker"), _idea("Broken Timer")])
+    queue = BuildQueue(tmp_path / "build_queue.db", max_attempts=2, retry_delay=0)
+    worker = BuildWorker(queue, _scheduler(tmp_path, store))
+
+    jobs = queue.enqueue([_idea("Chore Tracker"), _idea("Broken Timer")])
+    assert [created for _, created in jobs] == [True, True]
+    worker.drain(poll=0.05)
+
+    ok, broken = (queue.get(job["id"]) for job, _ in jobs)
+    assert ok["state"] == "succeeded" and ok["attempts"] == 1
+    assert broken["state"] == "failed" and broken["attempts"] == 2
+    assert _status(store, "Broken Timer") == "build_failed"
+
+    # Same ideas again: nothing new is queued, even under a differently cased name
+    again = queue.enqueue([_idea("chore tracker"), _idea("Broken Timer")])
+    assert [created for _, created in again] == [False, False]
+
+    # retry_failed re-queues only the failed build, with a fresh attempt budget
+    again = queue.enqueue([_idea("Chore Tracker"), _idea("Broken Timer")], retry_failed=True)
+    assert [created for _, created in again] == [False, True]
+    assert queue.counts()["queued"] == 1
+
+
+def test_drain_recovers_jobs_left_running_by_a_dead_worker(tmp_path):
+    queue = BuildQueue(tmp_path / "build_queue.db", max_attempts=2, retry_delay=0)
+    (job, _), = queue.enqueue([_idea("Chore Tracker")])
+    queue.claim("dead-worker")
+    queue.conn.execute("UPDATE build_jobs SET started_at = 0 WHERE id = ?", (job["id"],))
+
+    BuildWorker(queue, _scheduler(tmp_path, timeout=1)).drain(poll=0.05)
+
+    job = queue.get(job["id"])
+    assert job["state"] == "succeeded" and job["attempts"] == 2
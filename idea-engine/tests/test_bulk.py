@@ -0,0 +1,71 @@
+import json
+
+from src.analyzer import IdeaAnalyzer
+from src.bulk import BulkAnalyzer
+from src.storage import IdeaStore
+
+from .fake_batches import FakeBatchesClient
+
+
+def _posts(n: int) -> list[dict]:
+    return [
+        {"id": f"p{i}", "source": "hackernews", "title": f"Need an app for chore {i}",
+         "body": "Every tracker I tried is clunky.", "score": 10 + i, "num_comments": 3}
+        for i in range(n)
+    ]
+
+
+def _respond(outcomes: dict):
+    """Outcome per post id: an idea for "ok", else the failure type."""
+    def respond(custom_id, params):
+        prompt = params["messages"][0]["content"]
+        post_id = next(pid for pid in outcomes if f'"{pid}"' in prompt)
+        outcome = outcomes[post_id]
+        if outcome != "ok":
+            return outcome
+        return json.dumps([{"id": post_id, "name": f"Chore app {post_id}", "description": "Tracks chores",
+                            "confidence": 7}])
+    return respond
+
+
+def _bulk(tmp_path, outcomes: dict, polls: int = 1) -> tuple[BulkAnalyzer, FakeBatchesClient]:
+    client = FakeBatchesClient(_respond(outcomes), polls=polls)
+    analyzer = IdeaAnalyzer("test-key", client=client)
+    return BulkAnalyzer(analyzer, job_dir=tmp_path / "bulk_jobs"), client
+
+
+def test_submit_wait_collect_keeps_failed_posts_pending(tmp_path):
+    outcomes = {"p0": "ok", "p1": "errored", "p2": "ok", "p3": "expired"}
+    bulk, client = _bulk(tmp_path, outcomes, polls=2)
+    store = IdeaStore(tmp_path)
+    posts = _posts(4)
+
+    job_id = bulk.submit(posts, batch_size=1)
+    assert len(client.messages.batches.jobs[job_id]["requests"]) == 4
+    assert bulk.pending_job() == job_id
+
+    assert bulk.wait(job_id, poll_interval=0)
+    assert client.messages.batches.jobs[job_id]["retrieved"] == 3
+
+    ideas = bulk.collect(job_id, store)
+    assert sorted(idea["name"] for idea in ideas) == ["Chore app p0", "Chore app p2"]
+    assert [p["id"] for p in store.pending_posts(posts)] == ["p1", "p3"]
+    assert bulk.analyzer.usage["input_tokens"] == 200
+
+    job = json.loads((tmp_path / "bulk_jobs" / f"{job_id}.json").read_text(encoding="utf-8"))
+    assert job["status"] == "collected"
+    assert job["failed_batches"] == 2
+    assert bulk.pending_job() is None
+
+
+def test_wait_times_out_while_job_is_processing(tmp_path):
+    bulk, _ = _bulk(tmp_path, {"p0": "ok"}, polls=100)
+    job_id = bulk.submit(_posts(1))
+    assert not bulk.wait(job_id, poll_interval=0, timeout=0)
+    assert bulk.pending_job() == job_id
+
+
+def test_submit_without_posts_creates_no_job(tmp_path):
+    bulk, client = _bulk(tmp_path, {})
+    assert bulk.submit([]) is None
+    assert client.messages.batches.jobs == {}